@@ -0,0 +1,215 @@
+"""
+load generator for the eight game routes, reporting throughput and p50/p95/p99 latency per route
+
+by default the function app is imported in-process with QuiplashBackend=fake, so no Azure resources are used
+and the injected latencies (FakeCosmosLatencyMs, FakeTranslatorLatencyMs, FakeOpenAILatencyMs) stand in for them:
+    python benchmarks/loadTest.py [--players 50] [--requests 2000] [--concurrency 32] [--json results.json]
+
+with --url the same workload is sent over HTTP, e.g. to `func start` running with QuiplashBackend=fake:
+    python benchmarks/loadTest.py --url http://localhost:7071/ [--key <function key>]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+# the eight routes of the game, with their HTTP methods
+Routes = {
+    "player/register": "POST",
+    "player/login": "GET",
+    "player/update": "PUT",
+    "prompt/create": "POST",
+    "prompt/suggest": "POST",
+    "prompt/delete": "POST",
+    "utils/get": "GET",
+    "utils/podium": "GET"
+}
+
+# share of the mixed phase each route gets, players register before and delete their prompts after
+Weights = {
+    "player/login": 25,
+    "player/update": 20,
+    "prompt/create": 20,
+    "utils/get": 15,
+    "utils/podium": 15,
+    "prompt/suggest": 5
+}
+
+Texts = [
+    "What is the best food to bring to a party?",
+    "What is the worst thing to hear from a pilot?",
+    "What would you name a pet rock?",
+    "¿Cuál es la mejor comida para una fiesta?",
+    "¿Qué nombre le pondrías a una roca mascota?"
+]
+
+Keywords = ["pirate", "office", "holiday", "robot", "wedding"]
+
+# settings the function app requires, only used in-process
+FakeSettings = {
+    "QuiplashBackend": "fake",
+    "AzureCosmosDBConnectionString": "fake",
+    "DatabaseName": "quiplash",
+    "PlayerContainerName": "player",
+    "PromptContainerName": "prompt",
+    "TranslationEndpoint": "https://translator.fake/",
+    "TranslationKey": "fake",
+    "TranslationRegion": "fake",
+    "OAIEndpoint": "https://openai.fake/",
+    "OAIKey": "fake"
+}
+
+def percentile(samples, q):
+    """
+    nearest rank percentile of sorted samples
+    """
+    if len(samples) == 0:
+        return None
+    return samples[min(len(samples) - 1, max(0, int(q * len(samples) + 0.5) - 1))]
+
+class InProcessClient:
+    """
+    calls the function app's handlers directly
+    """
+    def __init__(self):
+        for name, value in FakeSettings.items():
+            os.environ.setdefault(name, value)
+        sys.path.append(str(Path(__file__).parent.parent))
+        import azure.functions as func
+        import function_app
+
+        self.func = func
+        self.handlers = {}
+        for function in function_app.app.get_functions():
+            route = getattr(function.get_trigger(), "route", None)
+            if route in Routes:
+                self.handlers[route] = function.get_user_function()
+
+    async def call(self, route, body):
+        request = self.func.HttpRequest(method=Routes[route], url="http://localhost/api/" + route, headers={},
+                                        params={}, route_params={}, body=json.dumps(body).encode("utf-8"))
+        response = await self.handlers[route](request)
+        return response.status_code
+
+    async def close(self):
+        pass
+
+class HttpClient:
+    """
+    sends requests to a running function app
+    """
+    def __init__(self, url, key=None):
+        import httpx
+        self.url = url if url.endswith("/") else url + "/"
+        headers = {} if key is None else {"x-functions-key": key}
+        self.client = httpx.AsyncClient(headers=headers, timeout=60)
+
+    async def call(self, route, body):
+        response = await self.client.request(Routes[route], self.url + "api/" + route, json=body)
+        return response.status_code
+
+    async def close(self):
+        await self.client.aclose()
+
+class LoadTest:
+    def __init__(self, client, players, concurrency, seed=2425):
+        self.client = client
+        self.players = [f"player{i:05d}" for i in range(players)]
+        self.limit = asyncio.Semaphore(concurrency)
+        self.random = random.Random(seed)
+        # route -> latencies in ms
+        self.latencies = {route: [] for route in Routes}
+        self.errors = {route: 0 for route in Routes}
+
+    def body(self, route, username):
+        if route == "player/register" or route == "player/login":
+            return {"username": username, "password": "password123"}
+        if route == "player/update":
+            return {"username": username, "add_to_games_played": 1, "add_to_score": self.random.randint(0, 100)}
+        if route == "prompt/create":
+            return {"username": username, "text": self.random.choice(Texts)}
+        if route == "prompt/suggest":
+            return {"keyword": self.random.choice(Keywords)}
+        if route == "prompt/delete":
+            return {"player": username}
+        if route == "utils/get":
+            return {"players": self.random.sample(self.players, min(5, len(self.players))),
+                    "language": self.random.choice(["en", "es"])}
+        return {}
+
+    async def request(self, route, username):
+        body = self.body(route, username)
+        async with self.limit:
+            start = time.perf_counter()
+            try:
+                status = await self.client.call(route, body)
+            except Exception:
+                status = 500
+            self.latencies[route].append((time.perf_counter() - start) * 1000)
+        if status >= 500:
+            self.errors[route] += 1
+
+    async def phase(self, requests):
+        await asyncio.gather(*[self.request(route, username) for route, username in requests])
+
+    async def run(self, requests):
+        """
+        registers every player, sends requests weighted by Weights, then deletes every player's prompts
+        returns the elapsed seconds
+        """
+        start = time.perf_counter()
+        await self.phase([("player/register", username) for username in self.players])
+        routes = self.random.choices(list(Weights), weights=list(Weights.values()), k=requests)
+        await self.phase([(route, self.random.choice(self.players)) for route in routes])
+        await self.phase([("prompt/delete", username) for username in self.players])
+        return time.perf_counter() - start
+
+    def report(self, elapsed):
+        routes = {}
+        for route, latencies in self.latencies.items():
+            latencies = sorted(latencies)
+            routes[route] = {
+                "requests": len(latencies),
+                "errors": self.errors[route],
+                "throughput": round(len(latencies) / elapsed, 1),
+                "p50": round(percentile(latencies, 0.5), 1) if latencies else None,
+                "p95": round(percentile(latencies, 0.95), 1) if latencies else None,
+                "p99": round(percentile(latencies, 0.99), 1) if latencies else None
+            }
+        total = sum(route['requests'] for route in routes.values())
+        return {"seconds": round(elapsed, 2), "requests": total, "throughput": round(total / elapsed, 1), "routes": routes}
+
+def printReport(report):
+    print(f"{report['requests']} requests in {report['seconds']} s, {report['throughput']} requests/s")
+    print(f"{'route':<18}{'requests':>10}{'errors':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for route, row in report['routes'].items():
+        print(f"{route:<18}{row['requests']:>10}{row['errors']:>8}{row['throughput']:>9}"
+              f"{str(row['p50']):>9}{str(row['p95']):>9}{str(row['p99']):>9}")
+
+async def main(args):
+    client = HttpClient(args.url, args.key) if args.url else InProcessClient()
+    try:
+        test = LoadTest(client, args.players, args.concurrency, args.seed)
+        elapsed = await test.run(args.requests)
+    finally:
+        await client.close()
+    report = test.report(elapsed)
+    printReport(report)
+    if args.json:
+        with open(args.json, "w") as results_file:
+            json.dump(report, results_file, indent=2)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Drive the game routes and report throughput and latency percentiles")
+    parser.add_argument("--players", type=int, default=50, help="players registered before the mixed phase")
+    parser.add_argument("--requests", type=int, default=2000, help="requests in the mixed phase")
+    parser.add_argument("--concurrency", type=int, default=32, help="requests in flight at once")
+    parser.add_argument("--seed", type=int, default=2425, help="seed of the request mix")
+    parser.add_argument("--url", help="base URL of a running function app, instead of calling it in-process")
+    parser.add_argument("--key", help="function key sent with --url")
+    parser.add_argument("--json", help="also write the report to this file")
+    asyncio.run(main(parser.parse_args()))
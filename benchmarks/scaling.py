@@ -0,0 +1,174 @@
+"""
+scaling micro-benchmarks of the pure Python work behind utils/podium and utils/get, over synthetic documents
+
+    python benchmarks/scaling.py [--sizes 10000,100000,1000000] [--save] [--tolerance 0.25]
+
+each case is timed (best of --repeats) and run once more under tracemalloc for its peak memory.
+documents are generated as a stream, like pages decoded by the Cosmos SDK, so the times include building them
+and the peak memory is what the code under test keeps.
+results are compared with benchmarks/scalingBaseline.json: a case slower or bigger than the baseline by more
+than the tolerance is flagged and the exit status is 1. --save records the results as the new baseline
+(baselines are machine specific, record them on the machine that compares against them).
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from loadTest import FakeSettings
+
+for name, value in FakeSettings.items():
+    os.environ.setdefault(name, value)
+sys.path.append(str(Path(__file__).parent.parent))
+import function_app
+from shared_code import FastJson, Podium
+from shared_code.PromptIndex import entries
+
+BaselinePath = Path(__file__).parent / "scalingBaseline.json"
+
+# differences below these are noise, whatever the tolerance
+MinSeconds = 0.005
+MinBytes = 2 ** 20
+
+Languages = ["en", "ga", "es", "hi", "zh-Hans", "pl"]
+
+def scramble(i, modulo):
+    """
+    cheap deterministic pseudo random value in [0, modulo) for document i
+    """
+    return (i * 2654435761 + 2425) % 4294967296 % modulo
+
+def players(n, distribution):
+    """
+    yields n player documents as the podium query returns them (username, games_played, total_score)
+    uniform: spread out ppgr values, ties: a handful of ppgr values shared by many players,
+    new: nobody has played yet, so every player is in the top tier
+    """
+    for i in range(n):
+        if distribution == "uniform":
+            games_played = scramble(i, 501)
+            total_score = scramble(i + n, 100 * games_played + 1)
+        elif distribution == "ties":
+            games_played = 1 + scramble(i, 4)
+            total_score = games_played * 10 * (1 + scramble(i + n, 4))
+        else:
+            games_played = 0
+            total_score = 0
+        yield {"username": f"player{i:07d}", "games_played": games_played, "total_score": total_score}
+
+def promptRows(n):
+    """
+    yields n utils/get query rows ({id, texts} with the texts in the requested language)
+    """
+    for i in range(n):
+        yield {"id": f"{i:08d}-0000-4000-8000-000000000000", "texts": [f"What is the best thing about number {scramble(i, 10 ** 6)}?"]}
+
+def prompts(n):
+    """
+    yields n prompt documents with a text in every supported language
+    """
+    for i in range(n):
+        text = f"What is the best thing about number {scramble(i, 10 ** 6)}?"
+        yield {"id": f"{i:08d}-0000-4000-8000-000000000000", "username": f"player{i % 1000:07d}",
+               "texts": [{"language": language, "text": f"[{language}] {text}"} for language in Languages]}
+
+def podium(n, distribution):
+    ranking = Podium.TierRanking()
+    for player in players(n, distribution):
+        ranking.add(player)
+    return FastJson.dumps(Podium.podium(ranking.tiers()))
+
+def utilsGet(n):
+    return FastJson.dumps([function_app.promptRow(row, "player0000001") for row in promptRows(n)])
+
+def utilsGetNdjson(n):
+    return function_app.ndjson(function_app.promptRow(row, "player0000001") for row in promptRows(n))
+
+def promptIndex(n):
+    count = 0
+    for prompt in prompts(n):
+        count += len(entries(prompt))
+    return count
+
+# case name -> function of size
+Cases = {
+    "podium uniform": lambda n: podium(n, "uniform"),
+    "podium ties": lambda n: podium(n, "ties"),
+    "podium new players": lambda n: podium(n, "new"),
+    "utils/get json": utilsGet,
+    "utils/get ndjson": utilsGetNdjson,
+    "prompt index entries": promptIndex
+}
+
+def measure(case, n, repeats):
+    """
+    returns (best seconds, peak memory in bytes) of case at size n
+    """
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        Cases[case](n)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    tracemalloc.start()
+    Cases[case](n)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+def compare(results, baseline, tolerance):
+    """
+    returns the regressions of results against baseline, as messages
+    """
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        if result['seconds'] > base['seconds'] * (1 + tolerance) and result['seconds'] - base['seconds'] > MinSeconds:
+            regressions.append(f"{key}: {result['seconds']:.3f} s, baseline {base['seconds']:.3f} s")
+        if result['peakBytes'] > base['peakBytes'] * (1 + tolerance) and result['peakBytes'] - base['peakBytes'] > MinBytes:
+            regressions.append(f"{key}: peak {result['peakBytes'] / 2 ** 20:.1f} MiB, "
+                               f"baseline {base['peakBytes'] / 2 ** 20:.1f} MiB")
+    return regressions
+
+def main(args):
+    sizes = [int(size) for size in args.sizes.split(",")]
+    results = {}
+    print(f"{'case':<24}{'size':>10}{'seconds':>10}{'per item us':>13}{'peak MiB':>10}")
+    for case in Cases:
+        for n in sizes:
+            seconds, peak = measure(case, n, args.repeats if n < 10 ** 6 else 1)
+            results[f"{case} @ {n}"] = {"seconds": round(seconds, 4), "peakBytes": peak}
+            print(f"{case:<24}{n:>10}{seconds:>10.3f}{seconds / n * 10 ** 6:>13.2f}{peak / 2 ** 20:>10.1f}")
+
+    if args.save:
+        with open(BaselinePath, "w") as baseline_file:
+            json.dump({"python": platform.python_version(), "machine": platform.machine(), "results": results},
+                      baseline_file, indent=2)
+        print(f"Baseline saved to {BaselinePath}")
+        return 0
+
+    if not BaselinePath.exists():
+        print("No baseline, run with --save to record one")
+        return 0
+    with open(BaselinePath) as baseline_file:
+        baseline = json.load(baseline_file)
+    regressions = compare(results, baseline['results'], args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if len(regressions) == 0:
+        print(f"No regressions against the baseline (tolerance {args.tolerance:.0%})")
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Time podium ranking and utils/get processing at increasing sizes")
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="comma separated numbers of documents")
+    parser.add_argument("--repeats", type=int, default=3, help="timed runs per case below 1M documents, best is kept")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown or growth before flagging")
+    parser.add_argument("--save", action="store_true", help="record the results as the baseline")
+    sys.exit(main(parser.parse_args()))
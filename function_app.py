@@ -1,18 +1,67 @@
-import azure.functions as func
 import logging
-import json
 import os
-from azure.cosmos import CosmosClient
-from azure.cosmos.exceptions import CosmosHttpResponseError
-import requests
-from openai import AzureOpenAI
+import asyncio
+import functools
+import uuid
+import base64
+from shared_code import Startup
+
+# heavy dependencies every route needs are imported eagerly and timed,
+# openai and httpx are only imported by the first invocation that uses them
+with Startup.timed("azure.functions", "import"):
+    import azure.functions as func
+with Startup.timed("azure.cosmos", "import"):
+    from azure.cosmos.exceptions import CosmosHttpResponseError, CosmosBatchOperationError, CosmosResourceNotFoundError
+    from shared_code.PlayerStore import PlayerStore, QUERY_MODE, PATCH_UPDATE
+    from shared_code.Leaderboard import LeaderboardStore
+    from shared_code.PromptIndex import PromptIndex
+from shared_code import Podium, FastJson, Metrics, Resilience
+from shared_code.Player import Player
+from shared_code.Prompt import Prompt
+from shared_code.TranslationCache import TranslationCache
+from shared_code.SuggestionPool import SuggestionPool
+from shared_code.ExistenceCache import ExistenceCache
+from shared_code.SingleFlight import SingleFlight
 
 app = func.FunctionApp()
 
-MyCosmos = CosmosClient.from_connection_string(os.environ['AzureCosmosDBConnectionString'])
-QuiplashDBProxy = MyCosmos.get_database_client(os.environ['DatabaseName'])
-PlayerContainerProxy = QuiplashDBProxy.get_container_client(os.environ['PlayerContainerName'])
-PromptContainerProxy = QuiplashDBProxy.get_container_client(os.environ['PromptContainerName'])
+# "azure" or "fake" (in-memory Cosmos, Translator and OpenAI stand-ins for offline load tests, see benchmarks/loadTest.py)
+QuiplashBackend = os.environ.get('QuiplashBackend', "azure")
+FAKE_BACKEND = "fake"
+
+# "query" (legacy, generated ids) or "keyed" (username is the id), see scripts/migratePlayers.py
+PlayerStorageMode = os.environ.get('PlayerStorageMode', QUERY_MODE)
+# "patch" (server side increments) or "etag" (optimistic concurrency) for player/update
+PlayerUpdateMode = os.environ.get('PlayerUpdateMode', PATCH_UPDATE)
+
+# players found or registered by this worker, so prompt/create and player/update skip the existence lookup
+KnownPlayers = ExistenceCache(
+    maxSize=int(os.environ.get('KnownPlayersSize', 100000)),
+    ttl=float(os.environ.get('KnownPlayersSeconds', 3600))
+)
+
+# player/updateBatch accepts at most UpdateBatchMaxSize updates, applying UpdateBatchMaxConcurrency at a time
+UpdateBatchMaxSize = int(os.environ.get('UpdateBatchMaxSize', 100))
+UpdateBatchLimit = asyncio.Semaphore(int(os.environ.get('UpdateBatchMaxConcurrency', 8)))
+
+# players read per page when ranking the podium
+PodiumPageSize = int(os.environ.get('PodiumPageSize', 1000))
+
+# per player prompt queries in utils/get run concurrently, at most UtilsMaxConcurrency at a time
+UtilsMaxConcurrency = int(os.environ.get('UtilsMaxConcurrency', 16))
+UtilsLimit = asyncio.Semaphore(UtilsMaxConcurrency)
+# largest page of prompts utils/get returns when a pageSize is requested
+UtilsMaxPageSize = int(os.environ.get('UtilsMaxPageSize', 1000))
+
+# prompt/delete removes prompts in transactional batches (Cosmos allows at most 100 operations per batch)
+DeleteBatchSize = min(int(os.environ.get('DeleteBatchSize', 100)), 100)
+DeleteMaxConcurrency = int(os.environ.get('DeleteMaxConcurrency', 4))
+DeleteLimit = asyncio.Semaphore(DeleteMaxConcurrency)
+
+# optional materialized podium, maintained from the player container change feed
+LeaderboardContainerName = os.environ.get('LeaderboardContainerName')
+# per language prompt index maintained from the prompt change feed, utils/get reads it when set
+PromptIndexContainerName = os.environ.get('PromptIndexContainerName')
 
 # Translation Serive
 TranslationEndpoint = os.environ['TranslationEndpoint']
@@ -20,411 +69,915 @@ TranslationKey = os.environ['TranslationKey']
 TranslationRegion = os.environ['TranslationRegion']
 # English, Irish, Spanish, Hindi, Chinese Simplified and Polish
 SupportedLanguages = ["en", "ga", "es", "hi", "zh-Hans", "pl"]
+# prompt/createBulk accepts at most BulkCreateMaxSize texts, inserted in transactional batches of CreateBatchSize
+BulkCreateMaxSize = int(os.environ.get('BulkCreateMaxSize', 500))
+CreateBatchSize = 100
+# detection and translation results of recent prompt texts, optionally stored in Cosmos
+TranslationCacheContainerName = os.environ.get('TranslationCacheContainerName')
 
 # OpenAI Service
 OpenAIEndpoint = os.environ['OAIEndpoint']
 OpenAIKey = os.environ['OAIKey']
 OpenApiVersion = "2024-08-01-preview"
-OpenAiClient = AzureOpenAI(azure_endpoint=OpenAIEndpoint, api_key=OpenAIKey, api_version=OpenApiVersion)
+# candidates generated per suggestion request
+SuggestionCandidates = int(os.environ.get('SuggestionCandidates', 4))
+# unused valid suggestions per keyword, refilled in the background below SuggestionPoolMin
+Suggestions = SuggestionPool(
+    lambda keyword: generateSuggestions(keyword),
+    lambda suggestion, keyword: isValidSuggestion(suggestion, keyword),
+    minSize=int(os.environ.get('SuggestionPoolMin', 2)),
+    maxSize=int(os.environ.get('SuggestionPoolMax', 12)),
+    maxKeywords=int(os.environ.get('SuggestionPoolKeywords', 1000))
+)
+
+# Resilience: every request answers within RequestDeadlineSeconds, transient failures are retried with jittered
+# exponential backoff (or the wait the service asks for), and failing Translator/OpenAI calls open a circuit
+RequestDeadlineSeconds = float(os.environ.get('RequestDeadlineSeconds', 20))
+RetryAttempts = int(os.environ.get('RetryAttempts', 4))
+RetryBaseSeconds = float(os.environ.get('RetryBaseSeconds', 0.1))
+RetryMaxSeconds = float(os.environ.get('RetryMaxSeconds', 2))
+TranslatorBreaker = Resilience.CircuitBreaker(
+    "translator",
+    failureThreshold=int(os.environ.get('BreakerFailures', 5)),
+    resetSeconds=float(os.environ.get('BreakerResetSeconds', 30))
+)
+OpenAIBreaker = Resilience.CircuitBreaker(
+    "openai",
+    failureThreshold=int(os.environ.get('BreakerFailures', 5)),
+    resetSeconds=float(os.environ.get('BreakerResetSeconds', 30))
+)
+# transient Cosmos statuses: reads are retried for all of them, but a 503 does not prove a write was not applied,
+# so writes (e.g. a patch incr, or a create with a generated id) are only retried when throttled or told to retry
+CosmosRetryableStatus = {429, 449, 503}
+CosmosWriteRetryableStatus = {429, 449}
+
+def retryPolicy(name, **kwargs):
+    return Resilience.RetryPolicy(name, attempts=RetryAttempts, baseSeconds=RetryBaseSeconds, maxSeconds=RetryMaxSeconds, **kwargs)
+
+# async clients are built on first use and then shared by every invocation on the worker's event loop
+
+@functools.cache
+def getDatabase():
+    if QuiplashBackend == FAKE_BACKEND:
+        from shared_code.Fakes import FakeDatabase
+        partitionKeys = {os.environ['PlayerContainerName']: "/id", os.environ['PromptContainerName']: "/username"}
+        if PromptIndexContainerName:
+            partitionKeys[PromptIndexContainerName] = "/username"
+        return FakeDatabase(partitionKeys, latency=float(os.environ.get('FakeCosmosLatencyMs', 5)) / 1000)
+    with Startup.timed("azure.cosmos.aio", "import"):
+        from azure.cosmos.aio import CosmosClient
+    with Startup.timed("azure.cosmos.aio", "init"):
+        # the SDK waits out throttling itself, never for longer than a request may take
+        MyCosmos = CosmosClient.from_connection_string(os.environ['AzureCosmosDBConnectionString'],
+                                                       retry_backoff_max=int(RequestDeadlineSeconds))
+        return MyCosmos.get_database_client(os.environ['DatabaseName'])
+
+@functools.cache
+def getContainer(name):
+    # every call made through the container is recorded by Metrics, and item calls are retried when throttled
+    container = Metrics.Instrumented(getDatabase().get_container_client(name))
+    return Resilience.Resilient(
+        container,
+        retryPolicy(container.dependency, retryableStatus=CosmosRetryableStatus),
+        writePolicy=retryPolicy(container.dependency, retryableStatus=CosmosWriteRetryableStatus, transient=())
+    )
+
+@functools.cache
+def getPlayerContainer():
+    return getContainer(os.environ['PlayerContainerName'])
+
+@functools.cache
+def getPromptContainer():
+    return getContainer(os.environ['PromptContainerName'])
+
+@functools.cache
+def getPlayers():
+    return PlayerStore(getPlayerContainer(), PlayerStorageMode, PlayerUpdateMode, known=KnownPlayers)
+
+@functools.cache
+def getLeaderboards():
+    return LeaderboardStore(
+        getContainer(LeaderboardContainerName),
+        getPlayerContainer(),
+        depth=int(os.environ.get('LeaderboardDepth', 10)),
+        maxPlayers=int(os.environ.get('LeaderboardMaxPlayers', 1000))
+    )
+
+@functools.cache
+def getPromptIndex():
+    return PromptIndex(
+        getContainer(PromptIndexContainerName),
+        getPromptContainer(),
+        maxConcurrency=DeleteMaxConcurrency
+    )
+
+@functools.cache
+def getTranslator():
+    # one pooled keep-alive client per worker, shared across invocations
+    with Startup.timed("httpx", "import"):
+        from shared_code.Translator import Translator, Transient
+    with Startup.timed("httpx", "init"):
+        return Translator(
+            TranslationEndpoint, TranslationKey, TranslationRegion,
+            poolSize=int(os.environ.get('TranslationPoolSize', 10)),
+            connectTimeout=float(os.environ.get('TranslationConnectTimeout', 3.05)),
+            readTimeout=float(os.environ.get('TranslationReadTimeout', 10)),
+            transport=getFakeTranslatorTransport() if QuiplashBackend == FAKE_BACKEND else None,
+            policy=retryPolicy("translator", transient=Transient),
+            breaker=TranslatorBreaker
+        )
+
+def getFakeTranslatorTransport():
+    from shared_code.Fakes import translatorTransport
+    return translatorTransport(latency=float(os.environ.get('FakeTranslatorLatencyMs', 50)) / 1000)
+
+@functools.cache
+def getTranslationResults():
+    return TranslationCache(
+        maxSize=int(os.environ.get('TranslationCacheSize', 1024)),
+        ttl=float(os.environ.get('TranslationCacheSeconds', 86400)),
+        container=getContainer(TranslationCacheContainerName) if TranslationCacheContainerName else None
+    )
+
+@functools.cache
+def getOpenAiClient():
+    if QuiplashBackend == FAKE_BACKEND:
+        from shared_code.Fakes import FakeOpenAI
+        return FakeOpenAI(latency=float(os.environ.get('FakeOpenAILatencyMs', 500)) / 1000)
+    with Startup.timed("openai", "import"):
+        from openai import AsyncAzureOpenAI
+    with Startup.timed("openai", "init"):
+        # retries are made by getOpenAiPolicy, so they respect the request deadline and the circuit
+        return AsyncAzureOpenAI(azure_endpoint=OpenAIEndpoint, api_key=OpenAIKey, api_version=OpenApiVersion, max_retries=0)
+
+@functools.cache
+def getOpenAiPolicy():
+    if QuiplashBackend == FAKE_BACKEND:
+        return retryPolicy("openai")
+    from openai import APIConnectionError
+    return retryPolicy("openai", transient=(APIConnectionError, asyncio.TimeoutError))
+
+def resilient(handler):
+    """
+    runs handler within the request deadline, answering 503 with Retry-After when a dependency is unavailable
+    """
+    @functools.wraps(handler)
+    async def wrapper(req: func.HttpRequest) -> func.HttpResponse:
+        with Resilience.deadline(RequestDeadlineSeconds):
+            try:
+                return await handler(req)
+            except (Resilience.Unavailable, CosmosHttpResponseError) as error:
+                if isinstance(error, CosmosHttpResponseError) and error.status_code not in CosmosRetryableStatus:
+                    raise
+                retryAfter = getattr(error, "retryAfter", None) or Resilience.retryAfterOf(error) or 1
+                logging.warning(f'Service unavailable: {error}')
+                return func.HttpResponse(
+                    body = FastJson.dumps({"result": False, "msg": "Service unavailable, try again later" }),
+                    headers = {"Retry-After": str(max(1, round(retryAfter)))},
+                    status_code=503
+                )
+    return wrapper
   
 @app.route(route="player/register", auth_level=func.AuthLevel.FUNCTION, methods=["POST"])
-def registerPlayer(req: func.HttpRequest) -> func.HttpResponse:
+@Metrics.routed("player/register")
+@resilient
+async def registerPlayer(req: func.HttpRequest) -> func.HttpResponse:
     """
     registers player with username and password
     """
     logging.info('Python HTTP trigger function processed a request. Register Player')
 
-    input = req.get_json()
+    input = FastJson.loads(req.get_body())
     username = input.get('username')
     password = input.get('password')
 
-    # check if username and password are valid
-    if len(username) < 5 or len(username) > 15:
+    # new player with GP and TS set to 0, id is generated by the player store
+    player = Player(None, username, password, 0, 0)
+
+    # check if username and password are valid (player.json)
+    invalid = player.validate()
+    if 'username' in invalid:
         return func.HttpResponse(
-            body = json.dumps({"result": False, "msg": "Username less than 5 characters or more than 15 characters" }),
+            body = FastJson.dumps({"result": False, "msg": "Username less than 5 characters or more than 15 characters" }),
             status_code=400
         )
-    if len(password) < 8 or len(password) > 15:
+    if 'password' in invalid:
         return func.HttpResponse(
-            body = json.dumps({"result": False, "msg": "Password less than 8 characters or more than 15 characters" }),
+            body = FastJson.dumps({"result": False, "msg": "Password less than 8 characters or more than 15 characters" }),
             status_code=400
         )
     
-    # check if username already exists
-    result = PlayerContainerProxy.query_items(
-        query='SELECT * FROM player WHERE player.username = @username',
-        parameters=[dict(name='@username', value=username)],
-        enable_cross_partition_query=True
-    )
-    if len(list(result)) > 0:
+    # create player in DB
+    # fails if username already exists
+    if not await getPlayers().create(player.to_dict()):
         return func.HttpResponse(
-            body = json.dumps({"result": False, "msg": "Username already exists" }),
+            body = FastJson.dumps({"result": False, "msg": "Username already exists" }),
             status_code=400
         )
-
-    # create player in DB, set GP ans TS to 0
-    playerDict = {
-        "username" : username,
-        "password" : password,
-        "games_played" : 0,
-        "total_score" : 0
-    }
-    PlayerContainerProxy.create_item(body=playerDict, enable_automatic_id_generation=True)
     return func.HttpResponse(
-        body = json.dumps({"result": True, "msg": "OK" }),
+        body = FastJson.dumps({"result": True, "msg": "OK" }),
         status_code=200
     )
 
 @app.route(route="player/login", auth_level=func.AuthLevel.FUNCTION, methods=["GET"])
-def loginPlayer(req: func.HttpRequest) -> func.HttpResponse:
+@Metrics.routed("player/login")
+@resilient
+async def loginPlayer(req: func.HttpRequest) -> func.HttpResponse:
     """
     logs in player with username and password
     """
     logging.info('Python HTTP trigger function processed a request. Login Player')
 
-    input = req.get_json()
+    input = FastJson.loads(req.get_body())
     username = input.get('username')
     password = input.get('password')
 
     # check if username and password match in DB
-    result = PlayerContainerProxy.query_items(
-        query='SELECT * FROM player WHERE player.username = @username AND player.password = @password',
-        parameters=[dict(name='@username', value=username), dict(name='@password', value=password)],
-        enable_cross_partition_query=True
-    )
+    doc = await getPlayers().get(username)
+    player = None if doc is None else Player.from_dict(doc)
 
-    if len(list(result)) == 0:
+    if player is None or player.password != password:
         return func.HttpResponse(
-            body = json.dumps({"result": False, "msg": "Username or password incorrect" }),
+            body = FastJson.dumps({"result": False, "msg": "Username or password incorrect" }),
             status_code=401
         )
     
     return func.HttpResponse(
-        body = json.dumps({"result": True, "msg": "OK" })
+        body = FastJson.dumps({"result": True, "msg": "OK" })
     )
 
+def validateUpdate(update):
+    """
+    returns why update ({username, add_to_games_played, add_to_score}) is invalid, or None if it is valid
+    """
+    if not isinstance(update, dict) or not isinstance(update.get('username'), str):
+        return "Username missing"
+    for field in ['add_to_games_played', 'add_to_score']:
+        value = update.get(field)
+        if not isinstance(value, int) or isinstance(value, bool):
+            return f"{field} must be an integer"
+    return None
+
 @app.route(route="player/update", auth_level=func.AuthLevel.FUNCTION, methods=["PUT"])
-def updatePlayer(req: func.HttpRequest) -> func.HttpResponse:
+@Metrics.routed("player/update")
+@resilient
+async def updatePlayer(req: func.HttpRequest) -> func.HttpResponse:
     """
     updates player's games_played and total_score
     """
     logging.info('Python HTTP trigger function processed a request. Update Player')
 
-    input = req.get_json()
+    input = FastJson.loads(req.get_body())
     username = input.get('username')
     game_to_add = input.get('add_to_games_played')
     score_to_add = input.get('add_to_score')
 
-    # check if username exists in DB
-    result = PlayerContainerProxy.query_items(
-        query='SELECT * FROM player WHERE player.username = @username',
-        parameters=[dict(name='@username', value=username)],
-        enable_cross_partition_query=True
-    )
-    result = list(result)
-    if len(result) == 0:
+    # check if update is valid
+    error = validateUpdate(input)
+    if error is not None:
         return func.HttpResponse(
-            body = json.dumps({"result": False, "msg": "Player does not exist" }),
+            body = FastJson.dumps({"result": False, "msg": error }),
+            status_code=400
+        )
+
+    # add to player's games_played and total_score in DB, atomically
+    # fails if username does not exist
+    if not await getPlayers().increment(username, game_to_add, score_to_add):
+        return func.HttpResponse(
+            body = FastJson.dumps({"result": False, "msg": "Player does not exist" }),
             status_code=400
         )
-    elif len(result) > 1:
-        # TODO: return error??
-        pass
-    logging.info('Update Player: Player exists')
-    
-    # get player's games_played and total_score
-    player = json.loads(json.dumps(result[0]))
-    player_id = player['id']
-    player['games_played'] += game_to_add
-    player['total_score'] += score_to_add
-
-    # update player in DB
-    PlayerContainerProxy.replace_item(
-        item=player_id,
-        body=player
-    )
 
     logging.info('Update Player: Player updated')
+    PodiumResults.invalidate()
+
+    return func.HttpResponse(
+        body = FastJson.dumps({"result": True, "msg": "OK" }),
+        status_code=200
+    )
+
+async def applyUpdate(update):
+    """
+    applies one validated update, returns its per-player result
+    """
+    username = update['username']
+    async with UpdateBatchLimit:
+        try:
+            if not await getPlayers().increment(username, update['add_to_games_played'], update['add_to_score']):
+                return {"username": username, "result": False, "msg": "Player does not exist"}
+        except (CosmosHttpResponseError, Resilience.Unavailable, RuntimeError) as error:
+            # other players may already be updated, so this one is reported instead of failing the request
+            # (a client retrying the whole batch would add their scores twice)
+            logging.warning(f'Update Players: {username} not updated: {error}')
+            return {"username": username, "result": False, "msg": "Player not updated, try again later"}
+    return {"username": username, "result": True, "msg": "OK"}
+
+@app.route(route="player/updateBatch", auth_level=func.AuthLevel.FUNCTION, methods=["PUT"])
+@Metrics.routed("player/updateBatch")
+@resilient
+async def updatePlayers(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    updates games_played and total_score of every player in a list of player/update bodies, e.g. at the end of a game
+    nothing is applied unless every update is valid
+    """
+    logging.info('Python HTTP trigger function processed a request. Update Players')
+
+    updates = FastJson.loads(req.get_body())
+    if not isinstance(updates, list) or len(updates) == 0 or len(updates) > UpdateBatchMaxSize:
+        return func.HttpResponse(
+            body = FastJson.dumps({"result": False, "msg": f"Expected a list of 1 to {UpdateBatchMaxSize} updates" }),
+            status_code=400
+        )
+
+    # check if every update is valid
+    errors = [validateUpdate(update) for update in updates]
+    if any(error is not None for error in errors):
+        results = [{"username": update.get('username') if isinstance(update, dict) else None,
+                    "result": error is None, "msg": error or "OK"} for update, error in zip(updates, errors)]
+        return func.HttpResponse(
+            body = FastJson.dumps({"result": False, "msg": "Invalid update", "results": results }),
+            status_code=400
+        )
+
+    # apply increments concurrently, results in the order of updates
+    results = await asyncio.gather(*[applyUpdate(update) for update in updates])
+    failed = sum(1 for result in results if not result['result'])
+
+    logging.info(f'Update Players: {len(results) - failed} players updated')
+    PodiumResults.invalidate()
 
     return func.HttpResponse(
-        body = json.dumps({"result": True, "msg": "OK" }),
+        body = FastJson.dumps({
+            "result": failed == 0,
+            "msg": "OK" if failed == 0 else f"{failed} players not updated",
+            "results": results
+            }),
         status_code=200
     )
 
+def isValidPromptText(text):
+    """
+    prompt text must be between 20 and 100 characters long (prompt.json)
+    """
+    return Prompt.is_valid_text(text)
+
+def isSupportedLanguage(translationResult):
+    """
+    detected language must be supported and detected with confidence of at least 0.2
+    """
+    return translationResult['language'] in SupportedLanguages and translationResult['score'] >= 0.2
+
+def promptTexts(text, translationResult):
+    """
+    returns the texts of a prompt document, the original text instead of its self translation
+    """
+    lang = translationResult['language']
+    texts = [{"language": lang, "text": text}]
+    for language, translation in translationResult['translations'].items():
+        if language != lang:
+            texts.append({"language": language, "text": translation})
+    return texts
+
+async def translatePrompts(texts):
+    """
+    returns the detection and translation result for each of texts, to all supported languages
+    cached results are reused, the rest are translated in as few Translator requests as the service limits allow
+    """
+    cache = getTranslationResults()
+    results = await asyncio.gather(*[cache.get(text, SupportedLanguages) for text in texts])
+    missing = [text for text, result in zip(texts, results) if result is None]
+    if len(missing) == 0:
+        logging.info(f'Translate Prompts: {len(texts)} translation cache hits')
+        return list(results)
+
+    translator = getTranslator()
+    batches = translator.batches(missing, len(SupportedLanguages))
+    responses = await asyncio.gather(*[translator.detectAndTranslate(batch, to=SupportedLanguages) for batch in batches])
+    translated = [result for response in responses for result in response]
+    await asyncio.gather(*[cache.put(text, SupportedLanguages, result) for text, result in zip(missing, translated)])
+    logging.info(f'Translate Prompts: {len(missing)} texts translated in {len(batches)} requests')
+
+    translated = iter(translated)
+    return [result if result is not None else next(translated) for result in results]
+
 @app.route(route="prompt/create", auth_level=func.AuthLevel.FUNCTION, methods=["POST"])
-def createPrompt(req: func.HttpRequest) -> func.HttpResponse:
+@Metrics.routed("prompt/create")
+@resilient
+async def createPrompt(req: func.HttpRequest) -> func.HttpResponse:
     """
     Creates prompt for player (username) and adds it and its translations to the DB
     """
     logging.info('Python HTTP trigger function processed a request. Create Prompt')
 
-    input = req.get_json()
+    input = FastJson.loads(req.get_body())
     text = input.get('text')
     username = input.get('username')
 
     # check if username exists in DB
-    result = PlayerContainerProxy.query_items(
-        query='SELECT * FROM player WHERE player.username = @username',
-        parameters=[dict(name='@username', value=username)],
-        enable_cross_partition_query=True
-    )
-    result = list(result)
-    if len(result) == 0:
+    if not await getPlayers().exists(username):
         return func.HttpResponse(
-            body = json.dumps({"result": False, "msg": "Player does not exist" }),
+            body = FastJson.dumps({"result": False, "msg": "Player does not exist" }),
             status_code=400
         )
-    elif len(result) > 1:
-        # TODO: return error??
-        pass
     logging.info('Prompt Create: Player exists')
 
     # check if prompt text is valid (length 20 - 100)
-    if len(text) < 20 or len(text) > 100:
+    if not isValidPromptText(text):
         return func.HttpResponse(
-                body = json.dumps({"result": False, "msg": "Prompt less than 20 characters or more than 100 characters" }),
+                body = FastJson.dumps({"result": False, "msg": "Prompt less than 20 characters or more than 100 characters" }),
                 status_code=400
             )
     logging.info('Prompt Create: Prompt text is of valid length')
 
+    # translate prompt to all supported languages, the service detects the language in the same request
+    translationResult = (await translatePrompts([text]))[0]
+
     # check if language is supported (Azure Text Translation service)
-    detectURL = TranslationEndpoint + "detect"
-    params = {"api-version": "3.0"}
-    headers = {
-        "Ocp-Apim-Subscription-Key": TranslationKey,
-        "Content-Type": "application/json",
-        "Ocp-Apim-Subscription-Region": TranslationRegion
-    }
-    body = [{"text": text}]
-    detectionRequest = requests.post(detectURL, params=params, headers=headers, json=body)
-    detectionResponse = detectionRequest.json()
-    lang = detectionResponse[0]['language']
-    confidence = detectionResponse[0]['score']
-    if lang not in SupportedLanguages or confidence < 0.2:
+    if not isSupportedLanguage(translationResult):
         return func.HttpResponse(
-                body = json.dumps({"result": False, "msg": "Unsupported language" }),
+                body = FastJson.dumps({"result": False, "msg": "Unsupported language" }),
                 status_code=400
             )
-    logging.info(f'Prompt Create: Language is supported {lang}')
-    
-    # translate prompt to all supported languages
-    languagesToTranslate = SupportedLanguages.copy()
-    languagesToTranslate.remove(lang)
-    translateURL = TranslationEndpoint + "translate"
-    params = {
-        "api-version": "3.0",
-        "from": lang,
-        "to": languagesToTranslate
-    }
-    headers = {
-        "Ocp-Apim-Subscription-Key": TranslationKey,
-        "Content-Type": "application/json",
-        "Ocp-Apim-Subscription-Region": TranslationRegion
-    }
-    body = [{"text": text}]
-    translationRequest = requests.post(translateURL, params=params, headers=headers, json=body)
-    translationResponse = translationRequest.json()
-    translations = translationResponse[0]['translations']
-    logging.info('Prompt Create: Prompt translated, inserting into DB')
+    logging.info(f"Prompt Create: Language is supported {translationResult['language']}, inserting into DB")
 
     # prepare document to insert into DB
-    texts = [{"language": lang, "text": text}]
-    for translation in translations:
-        translationDict = {"language": translation['to'], "text": translation['text']}
-        texts.append(translationDict)
-    promptDict = {"username": username, "texts": texts}
+    prompt = Prompt(None, username, promptTexts(text, translationResult))
 
     # insert prompt and translations into DB
-    PromptContainerProxy.create_item(body=promptDict, enable_automatic_id_generation=True)
+    await getPromptContainer().create_item(body=prompt.to_dict(), enable_automatic_id_generation=True)
+    return func.HttpResponse(
+        body = FastJson.dumps({"result": True, "msg": "OK" }),
+        status_code=200
+    )
+
+async def createPromptBatch(documents):
+    """
+    inserts prompt documents of one player in one transactional batch, returns False if none were inserted
+    """
+    try:
+        await getPromptContainer().execute_item_batch(
+            batch_operations=[("create", (document,)) for document in documents],
+            partition_key=documents[0]['username']
+        )
+    except (CosmosHttpResponseError, CosmosBatchOperationError, Resilience.Unavailable) as error:
+        # other batches may already be inserted, so this one is reported instead of failing the request
+        # (a client retrying every text would duplicate them, their ids are generated)
+        logging.warning(f'Prompt Create: batch of {len(documents)} prompts not inserted: {error}')
+        return False
+    return True
+
+@app.route(route="prompt/createBulk", auth_level=func.AuthLevel.FUNCTION, methods=["POST"])
+@Metrics.routed("prompt/createBulk")
+@resilient
+async def createPrompts(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    Creates many prompts for player (username) and adds them and their translations to the DB
+    each text is checked like prompt/create, valid texts are created even if others are not
+    """
+    logging.info('Python HTTP trigger function processed a request. Create Prompts')
+
+    input = FastJson.loads(req.get_body())
+    username = input.get('username')
+    texts = input.get('texts')
+
+    if not isinstance(texts, list) or len(texts) == 0 or len(texts) > BulkCreateMaxSize:
+        return func.HttpResponse(
+            body = FastJson.dumps({"result": False, "msg": f"Expected a list of 1 to {BulkCreateMaxSize} texts" }),
+            status_code=400
+        )
+
+    # check if username exists in DB
+    if not await getPlayers().exists(username):
+        return func.HttpResponse(
+            body = FastJson.dumps({"result": False, "msg": "Player does not exist" }),
+            status_code=400
+        )
+
+    # check prompt text lengths locally, only valid texts are translated
+    results = [None] * len(texts)
+    valid = []
+    for i, text in enumerate(texts):
+        if isValidPromptText(text):
+            valid.append(i)
+        else:
+            results[i] = {"result": False, "msg": "Prompt less than 20 characters or more than 100 characters"}
+
+    # translate valid texts to all supported languages, keep those in a supported language
+    documents = []
+    # index in texts of each document
+    positions = []
+    translationResults = await translatePrompts([texts[i] for i in valid])
+    for i, translationResult in zip(valid, translationResults):
+        if not isSupportedLanguage(translationResult):
+            results[i] = {"result": False, "msg": "Unsupported language"}
+            continue
+        documents.append(Prompt(str(uuid.uuid4()), username, promptTexts(texts[i], translationResult)).to_dict())
+        positions.append(i)
+        results[i] = {"result": True, "msg": "OK"}
+
+    # insert prompts into DB in transactional batches within the player's partition
+    starts = range(0, len(documents), CreateBatchSize)
+    inserted = await asyncio.gather(*[createPromptBatch(documents[start:start + CreateBatchSize]) for start in starts])
+    created = len(documents)
+    for start, ok in zip(starts, inserted):
+        if not ok:
+            for i in positions[start:start + CreateBatchSize]:
+                results[i] = {"result": False, "msg": "Prompt not created, try again later"}
+                created -= 1
+    logging.info(f'Prompt Create: {created} prompts inserted in {len(starts)} batches')
+
     return func.HttpResponse(
-        body = json.dumps({"result": True, "msg": "OK" }),
+        body = FastJson.dumps({
+            "result": created == len(texts),
+            "msg": f"{created} prompts created",
+            "results": results
+            }),
         status_code=200
     )
 
+async def generateSuggestions(keyword):
+    """
+    Uses Azure OpenAI service to generate candidate prompts that should include keyword
+    several candidates are generated in one call
+    """
+    AIPrompt = f'''Can you suggest a prompt that includes the keyword '{keyword}'? 
+        The prompt must be between 20 and 100 characters long. 
+        Also, the prompt will used in a game of Quiplash. 
+        Please only respond with a prompt, no other information.'''
+    async def complete():
+        with Metrics.span("openai", "chat.completions.create"):
+            return await getOpenAiClient().chat.completions.create(
+                model="gpt-3.5-turbo",
+                messages=[
+                    {"role": "system", "content": 
+                        "Assistant is a large language model trained to generate Quiplash prompts."},
+                    {"role": "user", "content": AIPrompt}
+                ],
+                n=SuggestionCandidates
+            )
+    result = await getOpenAiPolicy().call(complete, "chat.completions.create", OpenAIBreaker)
+    return [choice.message.content for choice in result.choices]
+
+def isValidSuggestion(suggestion, keyword):
+    """
+    suggestion must be between 20 and 100 characters long and include keyword
+    """
+    return len(suggestion) >= 20 and len(suggestion) <= 100 and keyword in suggestion
+
 @app.route(route="prompt/suggest", auth_level=func.AuthLevel.FUNCTION, methods=["POST"])
-def suggestPrompt(req: func.HttpRequest) -> func.HttpResponse:
+@Metrics.routed("prompt/suggest")
+@resilient
+async def suggestPrompt(req: func.HttpRequest) -> func.HttpResponse:
     """
     Uses Azure OpenAI service to suggest prompt that includes keyword
     """
     logging.info('Python HTTP trigger function processed a request. Suggest Prompt')
 
-    input = req.get_json()
+    input = FastJson.loads(req.get_body())
     keyword = input.get('keyword')
 
     logging.info(f"{OpenAIEndpoint}, {OpenAIKey}, {keyword}")
 
-    # Use Azure OpenAI service to suggest prompt - prompt must include keyword and valid length
-    suggestion = ""
-    AIPrompt = f'''Can you suggest a prompt that includes the keyword '{keyword}'? 
-        The prompt must be between 20 and 100 characters long. 
-        Also, the prompt will used in a game of Quiplash. 
-        Please only respond with a prompt, no other information.'''
-    valid = False
-    for i in range(4):
-        if len(suggestion) >= 20 and len(suggestion) <= 100 and keyword in suggestion:
-            valid = True
-            break
-        result = OpenAiClient.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": 
-                    "Assistant is a large language model trained to generate Quiplash prompts."},
-                {"role": "user", "content": AIPrompt}
-            ]
-        )
-        suggestion = result.choices[0].message.content
+    # valid suggestion from the keyword's pool, the pool only calls Azure OpenAI when it is empty
+    suggestion = await Suggestions.take(keyword)
     
-    if not valid:
+    if suggestion is None:
         return func.HttpResponse(
-            body = json.dumps({"suggestion" : "Cannot generate suggestion" }),
+            body = FastJson.dumps({"suggestion" : "Cannot generate suggestion" }),
             status_code=200
         )
 
     return func.HttpResponse(
-            body = json.dumps({"suggestion" : suggestion}),
+            body = FastJson.dumps({"suggestion" : suggestion}),
             status_code=200
         )
 
+async def deletePromptBatch(username, ids):
+    """
+    deletes prompts ids of player (username) in one transactional batch, returns number deleted
+    """
+    async with DeleteLimit:
+        try:
+            await getPromptContainer().execute_item_batch(
+                batch_operations=[("delete", (id,)) for id in ids],
+                partition_key=username
+            )
+            return len(ids)
+        except CosmosBatchOperationError:
+            # a prompt was already deleted (e.g. concurrent request), delete the rest one by one
+            count = 0
+            for id in ids:
+                try:
+                    await getPromptContainer().delete_item(item=id, partition_key=username)
+                    count += 1
+                except CosmosResourceNotFoundError:
+                    pass
+            return count
+
 @app.route(route="prompt/delete", auth_level=func.AuthLevel.FUNCTION, methods=["POST"])
-def deletePrompt(req: func.HttpRequest) -> func.HttpResponse: 
+@Metrics.routed("prompt/delete")
+@resilient
+async def deletePrompt(req: func.HttpRequest) -> func.HttpResponse: 
     """
     deletes all prompts authored by player (username)
     assume player exists
     """
     logging.info('Python HTTP trigger function processed a request. Delete Prompt')
 
-    input = req.get_json()
+    input = FastJson.loads(req.get_body())
     username = input.get('player')
-    count = 0
 
-    # Get all prompts authored by player
-    result = PromptContainerProxy.query_items(
-        query='SELECT * FROM prompt WHERE prompt.username = @username',
+    # Get ids of all prompts authored by player
+    result = getPromptContainer().query_items(
+        query='SELECT VALUE prompt.id FROM prompt WHERE prompt.username = @username',
         parameters=[dict(name='@username', value=username)],
         partition_key=username
     )
-    
-    # Delete all prompts authored by player, increment count
-    for prompt in result:
-        PromptContainerProxy.delete_item(item=prompt, partition_key=username)
-        count += 1
+    ids = [id async for id in result]
+
+    # Delete all prompts authored by player in transactional batches, sum deleted counts
+    batches = [ids[i:i + DeleteBatchSize] for i in range(0, len(ids), DeleteBatchSize)]
+    count = sum(await asyncio.gather(*[deletePromptBatch(username, batch) for batch in batches]))
+
+    # the change feed does not report deletions, remove the prompts from the index here
+    if PromptIndexContainerName:
+        await asyncio.gather(*[getPromptIndex().delete(username, batch) for batch in batches])
  
     return func.HttpResponse(
-            body = json.dumps({"result": True, "msg": f"{count} prompts deleted" }),
+            body = FastJson.dumps({"result": True, "msg": f"{count} prompts deleted" }),
             status_code=200
         )
 
+def queryPlayerPrompts(player, language, **kwargs):
+    """
+    queries {id, texts} of all prompts authored by player with a text in language, see promptRow
+    one row per prompt, so pages never split a prompt, and only the texts in language are returned by Cosmos
+    with a prompt index, rows are {id, text} read from the index instead
+    """
+    if PromptIndexContainerName:
+        return getPromptIndex().query(player, language, **kwargs)
+    return getPromptContainer().query_items(
+        query='SELECT prompt.id, ARRAY(SELECT VALUE t.text FROM t IN prompt.texts WHERE t.language = @language) AS texts '
+            'FROM prompt WHERE prompt.username = @username '
+            'AND ARRAY_CONTAINS(prompt.texts, {"language": @language}, true)',
+        parameters=[dict(name='@username', value=player), dict(name='@language', value=language)],
+        partition_key=player,
+        **kwargs
+    )
+
+def promptRow(doc, player):
+    """
+    {id, text, username} of a queryPlayerPrompts row, with the first text in language
+    """
+    text = doc.get('text') if 'text' in doc else doc.get('texts')[0]
+    return {"id": doc.get('id'), "text": text, "username": player}
+
+async def getPlayerPrompts(player, language):
+    """
+    returns [{id, text, username}] of all prompts authored by player, with text in language
+    """
+    async with UtilsLimit:
+        return [promptRow(doc, player) async for doc in queryPlayerPrompts(player, language)]
+
+def encodeContinuation(index, token):
+    """
+    continuation of utils/get pages: index of the next player in players, and the Cosmos continuation of its query
+    """
+    return base64.urlsafe_b64encode(FastJson.dumps([index, token])).decode("ascii")
+
+def decodeContinuation(continuation):
+    """
+    returns (index, token) of a continuation from encodeContinuation, or None if it is not one
+    """
+    try:
+        index, token = FastJson.loads(base64.urlsafe_b64decode(continuation))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(index, int) or index < 0 or not (token is None or isinstance(token, str)):
+        return None
+    return index, token
+
+async def getPromptsPage(players, language, pageSize, index=0, token=None):
+    """
+    returns (prompts, continuation) with at most pageSize prompts of players in order, starting at player index
+    token continues that player's query, continuation is None after the last page
+    """
+    prompts = []
+    while index < len(players) and len(prompts) < pageSize:
+        player = players[index]
+        pages = queryPlayerPrompts(player, language, max_item_count=pageSize - len(prompts)).by_page(token)
+        async for page in pages:
+            prompts.extend([promptRow(doc, player) async for doc in page])
+            break
+        token = pages.continuation_token
+        if token is None:
+            # player has no more prompts, move to the next one
+            index += 1
+    if index >= len(players):
+        return prompts, None
+    return prompts, encodeContinuation(index, token)
+
+def ndjson(prompts):
+    """
+    newline delimited JSON, one prompt per line
+    """
+    return b"".join(FastJson.dumps(prompt) + b"\n" for prompt in prompts)
+
 @app.route(route="utils/get", auth_level=func.AuthLevel.FUNCTION, methods=["GET"])
-def getUtils(req: func.HttpRequest) -> func.HttpResponse:
+@Metrics.routed("utils/get")
+@resilient
+async def getUtils(req: func.HttpRequest) -> func.HttpResponse:
     """
     returns a list of all prompts' text in a given language created by players in the list
     if player does not exist, skip. if player doesn't have any prompts, skip.
     assumes valid language
+
+    optional format "ndjson" returns one prompt per line instead of an array
+    optional pageSize returns {prompts, continuation} pages, pass continuation back to get the next page
+    (for ndjson the continuation is in the x-continuation header)
     """
     logging.info('Python HTTP trigger function processed a request. Get Utils')
 
-    input = req.get_json()
+    input = FastJson.loads(req.get_body())
     players = input.get('players')
     language = input.get('language')
+    format = input.get('format', "json")
+    pageSize = input.get('pageSize')
+    continuation = input.get('continuation')
 
-    prompts = []
-    # [{prompt_id, text, username}]
-
-    for player in players:
-        # get all prompts authored by player in language
-        result = PromptContainerProxy.query_items(
-            query='SELECT * FROM prompt WHERE prompt.username = @username',
-            parameters=[dict(name='@username', value=player)],
-            partition_key=player
+    if format not in ["json", "ndjson"]:
+        return func.HttpResponse(
+            body = FastJson.dumps({"result": False, "msg": "Format must be json or ndjson" }),
+            status_code=400
+        )
+    mimetype = "application/x-ndjson" if format == "ndjson" else "application/json"
+
+    if pageSize is None and continuation is None:
+        prompts = []
+        # [{prompt_id, text, username}]
+
+        # query players concurrently, results are merged in the order of players
+        for playerPrompts in await asyncio.gather(*[getPlayerPrompts(player, language) for player in players]):
+            prompts.extend(playerPrompts)
+
+        return func.HttpResponse(
+                body = ndjson(prompts) if format == "ndjson" else FastJson.dumps(prompts),
+                mimetype=mimetype,
+                status_code=200
+            )
+
+    if pageSize is None:
+        pageSize = UtilsMaxPageSize
+    if not isinstance(pageSize, int) or isinstance(pageSize, bool) or pageSize < 1 or pageSize > UtilsMaxPageSize:
+        return func.HttpResponse(
+            body = FastJson.dumps({"result": False, "msg": f"Page size must be between 1 and {UtilsMaxPageSize}" }),
+            status_code=400
+        )
+    position = (0, None) if continuation is None else decodeContinuation(continuation)
+    if position is None:
+        return func.HttpResponse(
+            body = FastJson.dumps({"result": False, "msg": "Invalid continuation" }),
+            status_code=400
         )
 
-        # get prompt text in specified language
-        for doc in result:
-            id = doc.get('id')
-            texts = doc.get('texts')
-            for text in texts:
-                if text.get('language') == language:
-                    # append to prompts
-                    prompt = {"id": id, "text": text.get('text'), "username": player}
-                    prompts.append(prompt)
-                    break
+    try:
+        prompts, continuation = await getPromptsPage(players, language, pageSize, *position)
+    except CosmosHttpResponseError as error:
+        # the token decoded but Cosmos did not issue it for this query (tampered, or another request's)
+        if error.status_code != 400 or position[1] is None:
+            raise
+        return func.HttpResponse(
+            body = FastJson.dumps({"result": False, "msg": "Invalid continuation" }),
+            status_code=400
+        )
+    logging.info(f'Get Utils: page of {len(prompts)} prompts, more: {continuation is not None}')
 
+    if format == "ndjson":
+        return func.HttpResponse(
+                body = ndjson(prompts),
+                headers = {} if continuation is None else {"x-continuation": continuation},
+                mimetype=mimetype,
+                status_code=200
+            )
     return func.HttpResponse(
-            body = json.dumps(prompts),
+            body = FastJson.dumps({"prompts": prompts, "continuation": continuation}),
+            mimetype=mimetype,
             status_code=200
         )
 
 @app.route(route="utils/podium", auth_level=func.AuthLevel.FUNCTION, methods=["GET"])
-def getPodium(req: func.HttpRequest) -> func.HttpResponse:
+@Metrics.routed("utils/podium")
+@resilient
+async def getPodium(req: func.HttpRequest) -> func.HttpResponse:
     """
     returns a dictionary of lists of players with the top 3 points per game ration (ppgr = total_score/games_played)
     if same ppgr, sort by increasing number of games, then increasing alphabetical order of username
     """
     logging.info('Python HTTP trigger function processed a request. Get Podium')
 
-    # get all players
-    players = PlayerContainerProxy.read_all_items()
-
-    # calculate ppgr for all players
-    # [(username, ppgr, games_played, total_score)]
-    playerStats = []
-    for player in players:
-        username = player.get('username')
-        games_played = player.get('games_played')
-        total_score = player.get('total_score')
-        if games_played == 0:
-            ppgr = 0
-        else:
-            ppgr = total_score / games_played
-        playerStats.append((username, ppgr, games_played, total_score))
-
-    # sort players by ppgr, then games_played, then username
-    sortedPlayers = sorted(playerStats, key=lambda x: (-x[1], x[2], x[0]))
-
-    # calculate gold silver and bronze players
-    gold = []
-    silver = []
-    bronze = []
-    try:
-        player = sortedPlayers.pop(0)
-        goldPpgr = player[1]
-        gold.append(player)
-        while sortedPlayers[0][1] == goldPpgr:
-            player = sortedPlayers.pop(0)
-            gold.append(player)
-    except IndexError:
-        pass
+    return func.HttpResponse(
+            body = await PodiumResults.get(),
+            status_code=200
+        )
 
-    try:
-        player = sortedPlayers.pop(0)
-        silverPpgr = player[1]
-        silver.append(player)
-        while sortedPlayers[0][1] == silverPpgr:
-            player = sortedPlayers.pop(0)
-            silver.append(player)
-    except IndexError:
-        pass
+async def computePodium():
+    """
+    returns the encoded podium
+    """
+    if LeaderboardContainerName:
+        # one point read of the materialized leaderboard
+        podium = (await getLeaderboards().read()).podium()
+    else:
+        # stream all players page by page, keeping only the top 3 ppgr tiers
+        players = getPlayerContainer().query_items(
+            query=Podium.PlayerStatsQuery,
+            max_item_count=PodiumPageSize
+        )
+        ranking = Podium.TierRanking()
+        async for player in players:
+            ranking.add(player)
+        podium = Podium.podium(ranking.tiers())
+    logging.info('Podium: computed')
+    return FastJson.dumps(podium)
+
+# concurrent utils/podium requests share one computation, whose result is reused for PodiumCacheSeconds
+# (0 only coalesces), player updates handled by this worker start a new one
+PodiumResults = SingleFlight(computePodium, ttl=float(os.environ.get('PodiumCacheSeconds', 0)))
+
+if LeaderboardContainerName:
+    @app.cosmos_db_trigger(arg_name="documents", 
+                           connection="AzureCosmosDBConnectionString",
+                           database_name="%DatabaseName%",
+                           container_name="%PlayerContainerName%",
+                           lease_container_name=os.environ.get('LeaseContainerName', "leases"),
+                           lease_container_prefix="leaderboard",
+                           create_lease_container_if_not_exists=True)
+    # the lease advances past a failed batch, so it is retried until applied or the board would miss those scores
+    @app.retry(strategy="exponential_backoff", max_retry_count="-1",
+               minimum_interval="00:00:02", maximum_interval="00:05:00")
+    @Metrics.routed("updateLeaderboard")
+    async def updateLeaderboard(documents: func.DocumentList) -> None:
+        """
+        applies changed players' games_played and total_score to the leaderboard
+        """
+        logging.info(f'Python Cosmos DB trigger function processed {len(documents)} players. Update Leaderboard')
+
+        await getLeaderboards().apply([doc.to_dict() for doc in documents])
+
+if PromptIndexContainerName:
+    @app.cosmos_db_trigger(arg_name="documents", 
+                           connection="AzureCosmosDBConnectionString",
+                           database_name="%DatabaseName%",
+                           container_name="%PromptContainerName%",
+                           lease_container_name=os.environ.get('LeaseContainerName', "leases"),
+                           lease_container_prefix="promptIndex",
+                           create_lease_container_if_not_exists=True,
+                           start_from_beginning=True)
+    # the lease advances past a failed batch, so it is retried until indexed or those prompts would never be served
+    @app.retry(strategy="exponential_backoff", max_retry_count="-1",
+               minimum_interval="00:00:02", maximum_interval="00:05:00")
+    @Metrics.routed("updatePromptIndex")
+    async def updatePromptIndex(documents: func.DocumentList) -> None:
+        """
+        indexes changed prompts by language, the first run indexes every existing prompt
+        """
+        logging.info(f'Python Cosmos DB trigger function processed {len(documents)} prompts. Update Prompt Index')
+
+        await getPromptIndex().apply([doc.to_dict() for doc in documents])
+
+@app.route(route="utils/stats", auth_level=func.AuthLevel.ADMIN, methods=["GET"])
+@Metrics.routed("utils/stats")
+async def getStats(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    returns this worker's cache counters, used to size the caches, and its startup import/init cost
+    """
+    logging.info('Python HTTP trigger function processed a request. Get Stats')
 
-    try:
-        player = sortedPlayers.pop(0)
-        bronzePpgr = player[1]
-        bronze.append(player)
-        while sortedPlayers[0][1] == bronzePpgr:
-            player = sortedPlayers.pop(0)
-            bronze.append(player)
-    except IndexError:
-        pass
+    return func.HttpResponse(
+            body = FastJson.dumps({
+                "translationCache": getTranslationResults().stats(),
+                "suggestionPool": Suggestions.stats(),
+                "knownPlayers": KnownPlayers.stats(),
+                "podium": PodiumResults.stats(),
+                "circuits": {"translator": TranslatorBreaker.stats(), "openai": OpenAIBreaker.stats()},
+                "startup": Startup.report()
+                }),
+            status_code=200
+        )
 
-    goldDict = [{"username":p[0], "games_played":p[2], "total_score":p[3]} for p in gold]
-    silverDict = [{"username":p[0], "games_played":p[2], "total_score":p[3]} for p in silver]
-    bronzeDict = [{"username":p[0], "games_played":p[2], "total_score":p[3]} for p in bronze]
+@app.route(route="utils/metrics", auth_level=func.AuthLevel.ADMIN, methods=["GET"])
+async def getMetrics(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    returns this worker's latency percentiles (ms), request charge (RU) and retries per route and dependency call
+    reset=true starts counting again after this report
+    """
+    logging.info('Python HTTP trigger function processed a request. Get Metrics')
 
+    report = Metrics.report()
+    if req.params.get('reset') == "true":
+        Metrics.reset()
 
     return func.HttpResponse(
-            body = json.dumps({
-                "gold": goldDict, 
-                "silver": silverDict, 
-                "bronze": bronzeDict
-                }),
+            body = FastJson.dumps(report),
             status_code=200
         )
\ No newline at end of file
@@ -0,0 +1,112 @@
+"""
+one shot migration of player documents from the "query" layout (Cosmos generated id)
+to the "keyed" layout (id is the username, escaped by PlayerStore.playerId) used when PlayerStorageMode is "keyed"
+
+run from the repo root with local.settings.json present:
+    python scripts/migratePlayers.py [--dry-run]
+
+the migration is safe to re-run: each player is copied to its keyed document before
+the old document is deleted, and an already migrated player only has its old document removed.
+players Cosmos fails to migrate are logged, counted as skipped and left in the old layout.
+switch PlayerStorageMode to "keyed" once the migration has finished.
+"""
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+
+from azure.cosmos import CosmosClient
+from azure.cosmos.exceptions import CosmosHttpResponseError, CosmosResourceExistsError, CosmosResourceNotFoundError
+
+sys.path.append(str(Path(__file__).parent.parent))
+from shared_code.PlayerStore import playerId
+
+# Cosmos system properties, regenerated on write
+SystemProperties = ["_rid", "_self", "_etag", "_attachments", "_ts"]
+
+def keyedDocument(doc):
+    """
+    returns a copy of player document doc keyed by its username
+    """
+    keyed = {key: value for key, value in doc.items() if key not in SystemProperties}
+    keyed['id'] = playerId(doc['username'])
+    return keyed
+
+def partitionKeyOf(doc, partitionKeyPath):
+    """
+    returns the value of doc at partitionKeyPath (e.g. /id)
+    """
+    value = doc
+    for part in partitionKeyPath.strip("/").split("/"):
+        value = value[part]
+    return value
+
+def migratePlayers(container, dryRun=False):
+    """
+    rewrites every legacy player document in container into the keyed layout
+    returns counts of migrated, already keyed, duplicate and skipped documents
+    """
+    partitionKeyPath = container.read()['partitionKey']['paths'][0]
+    counts = {"migrated": 0, "keyed": 0, "duplicates": 0, "skipped": 0}
+
+    for doc in container.read_all_items():
+        username = doc['username']
+        try:
+            counts[migratePlayer(container, doc, partitionKeyPath, dryRun)] += 1
+        except CosmosHttpResponseError as e:
+            # e.g. throttled past the SDK's retries, the rest of the players are still migrated
+            logging.warning(f"Player {username} ({doc['id']}) not migrated: {e.message}")
+            counts['skipped'] += 1
+
+    return counts
+
+def migratePlayer(container, doc, partitionKeyPath, dryRun=False):
+    """
+    rewrites legacy player document doc into the keyed layout, returns the count it belongs to
+    """
+    username = doc['username']
+    id = playerId(username)
+    if doc['id'] == id:
+        return 'keyed'
+
+    keyed = keyedDocument(doc)
+    if dryRun:
+        logging.info(f"Would migrate player {username} ({doc['id']})")
+        return 'migrated'
+
+    try:
+        container.create_item(body=keyed)
+    except CosmosResourceExistsError:
+        existing = container.read_item(item=id, partition_key=id)
+        if existing.get('password') != doc.get('password') or \
+                existing.get('games_played') != doc.get('games_played') or \
+                existing.get('total_score') != doc.get('total_score'):
+            # two different legacy documents with the same username, leave it for a human
+            logging.warning(f"Duplicate player {username} ({doc['id']}) not migrated")
+            return 'duplicates'
+        # copied by an earlier interrupted run, only the old document is left to remove
+
+    try:
+        container.delete_item(item=doc, partition_key=partitionKeyOf(doc, partitionKeyPath))
+    except CosmosResourceNotFoundError:
+        pass
+    logging.info(f"Migrated player {username} ({doc['id']})")
+    return 'migrated'
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Key player documents by username")
+    parser.add_argument("--dry-run", action="store_true", help="only report what would be migrated")
+    args = parser.parse_args()
+
+    pathToSettings = Path(__file__).parent.parent / 'local.settings.json'
+    with open(pathToSettings) as settings_file:
+        settings = json.load(settings_file)
+
+    MyCosmos = CosmosClient.from_connection_string(settings['Values']['AzureCosmosDBConnectionString'])
+    QuiplashDBProxy = MyCosmos.get_database_client(settings['Values']['DatabaseName'])
+    PlayerContainerProxy = QuiplashDBProxy.get_container_client(settings['Values']['PlayerContainerName'])
+
+    counts = migratePlayers(PlayerContainerProxy, dryRun=args.dry_run)
+    print(json.dumps(counts))
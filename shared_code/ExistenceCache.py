@@ -0,0 +1,47 @@
+import time
+from collections import OrderedDict
+
+class ExistenceCache:
+    """
+    usernames known to exist, with their document id and partition key
+    players are never deleted, so a positive entry stays true; the TTL only bounds staleness if one is removed by hand
+    used from a single event loop, so it needs no lock
+    """
+    def __init__(self, maxSize=100000, ttl=3600):
+        self.maxSize = maxSize
+        self.ttl = ttl
+        # username -> (expires, id, partition key), least recently used first
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, username):
+        """
+        returns (id, partition key) of username if it is known to exist, or None
+        """
+        entry = self.entries.get(username)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self.entries[username]
+            self.misses += 1
+            return None
+        self.entries.move_to_end(username)
+        self.hits += 1
+        return entry[1], entry[2]
+
+    def add(self, username, id, partitionKey):
+        self.entries[username] = (time.monotonic() + self.ttl, id, partitionKey)
+        self.entries.move_to_end(username)
+        while len(self.entries) > self.maxSize:
+            self.entries.popitem(last=False)
+
+    def forget(self, username):
+        self.entries.pop(username, None)
+
+    def stats(self):
+        return {
+            "size": len(self.entries),
+            "maxSize": self.maxSize,
+            "hits": self.hits,
+            "misses": self.misses
+        }
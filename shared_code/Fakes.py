@@ -0,0 +1,374 @@
+import asyncio
+import copy
+import json
+import re
+import uuid
+from types import SimpleNamespace
+
+from azure.cosmos.exceptions import (CosmosAccessConditionFailedError, CosmosBatchOperationError, CosmosHttpResponseError,
+                                     CosmosResourceExistsError, CosmosResourceNotFoundError)
+
+# in-memory stand-ins for Cosmos, the Translator and Azure OpenAI, selected with QuiplashBackend=fake
+# every call sleeps for a configurable latency so throughput can be measured offline, see benchmarks/loadTest.py
+
+# request charges reported in x-ms-request-charge, roughly the Cosmos cost of 1 KB documents
+ReadCharge = 1.0
+WriteCharge = 6.0
+QueryCharge = 2.5
+
+def splitTop(text, separator):
+    """
+    splits text on separator outside of parentheses, brackets and braces
+    """
+    parts = []
+    depth = 0
+    start = 0
+    i = 0
+    while i < len(text):
+        if text[i] in "([{":
+            depth += 1
+        elif text[i] in ")]}":
+            depth -= 1
+        elif depth == 0 and text.startswith(separator, i):
+            parts.append(text[start:i])
+            i += len(separator)
+            start = i
+            continue
+        i += 1
+    parts.append(text[start:])
+    return [part.strip() for part in parts]
+
+def path(doc, expr, alias):
+    """
+    value of alias.a.b or alias["a"] in doc, None if missing
+    """
+    value = doc
+    for part in re.findall(r'\.(\w+)|\["([^"]+)"\]', expr[len(alias):]):
+        name = part[0] or part[1]
+        if not isinstance(value, dict) or name not in value:
+            return None
+        value = value[name]
+    return value
+
+def evaluate(expr, alias, doc, params):
+    """
+    evaluates the expressions used by this app's queries
+    """
+    expr = expr.strip()
+    if expr.startswith("@"):
+        return params[expr]
+    if expr.startswith("{"):
+        return json.loads(re.sub(r'@\w+', lambda m: json.dumps(params[m.group(0)]), expr))
+    if expr.startswith("ARRAY_CONTAINS("):
+        args = splitTop(expr[len("ARRAY_CONTAINS("):-1], ",")
+        array = evaluate(args[0], alias, doc, params) or []
+        item = evaluate(args[1], alias, doc, params)
+        partial = len(args) > 2 and args[2] == "true"
+        if partial and isinstance(item, dict):
+            return any(isinstance(x, dict) and all(x.get(k) == v for k, v in item.items()) for x in array)
+        return item in array
+    match = re.fullmatch(r'ARRAY\(SELECT VALUE (\w+)(.*?) FROM \1 IN (.+?)(?: WHERE (.+))?\)', expr)
+    if match:
+        inner, field, source, where = match.groups()
+        items = evaluate(source, alias, doc, params) or []
+        return [path(item, inner + field, inner) for item in items
+                if where is None or matches(where, inner, item, params)]
+    if expr == alias or expr.startswith(alias + ".") or expr.startswith(alias + "["):
+        return path(doc, expr, alias)
+    raise NotImplementedError(f"Fake Cosmos: unsupported expression {expr}")
+
+def matches(where, alias, doc, params):
+    for condition in splitTop(where, " AND "):
+        equal = splitTop(condition, " = ")
+        if len(equal) == 2:
+            if evaluate(equal[0], alias, doc, params) != evaluate(equal[1], alias, doc, params):
+                return False
+        elif not evaluate(condition, alias, doc, params):
+            return False
+    return True
+
+def project(select, alias, doc, params):
+    if select.startswith("VALUE "):
+        return evaluate(select[len("VALUE "):], alias, doc, params)
+    if select == "*":
+        return doc
+    row = {}
+    for item in splitTop(select, ","):
+        parts = splitTop(item, " AS ")
+        name = parts[1] if len(parts) == 2 else re.findall(r'\w+', parts[0])[-1]
+        value = evaluate(parts[0], alias, doc, params)
+        if value is not None:
+            row[name] = value
+    return row
+
+def runQuery(query, parameters, docs):
+    """
+    runs a query of the form SELECT [VALUE] projection FROM alias [WHERE conditions] over docs
+    """
+    params = {p['name']: p['value'] for p in parameters or []}
+    select, source = splitTop(" ".join(query.split()), " FROM ")
+    select = select[len("SELECT "):]
+    source = splitTop(source, " WHERE ")
+    alias = source[0]
+    return [copy.deepcopy(project(select, alias, doc, params)) for doc in docs
+            if len(source) == 1 or matches(source[1], alias, doc, params)]
+
+def notFound(id):
+    return CosmosResourceNotFoundError(status_code=404, message=f"Resource {id} not found")
+
+class FakeResults:
+    """
+    query results like azure.cosmos.aio: iterate items, or by_page(continuation_token) for pages
+    each page fetched calls response_hook with its headers
+    """
+    def __init__(self, container, rows, max_item_count=None, response_hook=None):
+        self.container = container
+        self.rows = rows
+        self.pageSize = max_item_count or 100
+        self.response_hook = response_hook
+        self.continuation_token = None
+
+    async def fetch(self, start):
+        await self.container.delay()
+        page = self.rows[start:start + self.pageSize]
+        end = start + len(page)
+        self.continuation_token = str(end) if end < len(self.rows) else None
+        if self.response_hook is not None:
+            self.response_hook({"x-ms-request-charge": str(QueryCharge + 0.1 * len(page))}, page)
+        return page
+
+    async def __aiter__(self):
+        start = 0
+        while True:
+            page = await self.fetch(start)
+            for row in page:
+                yield row
+            if self.continuation_token is None:
+                return
+            start = int(self.continuation_token)
+
+    def by_page(self, continuation_token=None):
+        return FakePages(self, continuation_token)
+
+class FakePage:
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def __aiter__(self):
+        for row in self.rows:
+            yield row
+
+class FakePages:
+    def __init__(self, results, continuation_token):
+        self.results = results
+        self.token = continuation_token
+        self.start = None
+        self.done = False
+
+    @property
+    def continuation_token(self):
+        return self.results.continuation_token
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.done:
+            raise StopAsyncIteration
+        if self.start is None:
+            # like Cosmos, a token it did not issue is rejected when the first page is fetched
+            if self.token is not None and not str(self.token).isdigit():
+                raise CosmosHttpResponseError(status_code=400, message="Invalid continuation token")
+            self.start = int(self.token or 0)
+        page = await self.results.fetch(self.start)
+        if self.results.continuation_token is None:
+            self.done = True
+        else:
+            self.start = int(self.results.continuation_token)
+        return FakePage(page)
+
+class FakeContainer:
+    """
+    in-memory azure.cosmos.aio container, supporting the calls and queries this app makes
+    """
+    def __init__(self, id, partitionKeyPath="/id", latency=0.0):
+        self.id = id
+        self.partitionKeyPath = partitionKeyPath
+        self.latency = latency
+        # (partition key, id) -> document
+        self.docs = {}
+
+    async def delay(self):
+        if self.latency > 0:
+            await asyncio.sleep(self.latency)
+
+    def partitionKeyOf(self, doc):
+        return path(doc, "doc" + "".join(f'["{part}"]' for part in self.partitionKeyPath.strip("/").split("/")), "doc")
+
+    def store(self, doc, response_hook):
+        if any(c in doc['id'] for c in "/\\?#"):
+            raise CosmosHttpResponseError(status_code=400, message=f"The input name '{doc['id']}' is invalid")
+        doc = copy.deepcopy(doc)
+        doc['_etag'] = str(uuid.uuid4())
+        self.docs[(self.partitionKeyOf(doc), doc['id'])] = doc
+        if response_hook is not None:
+            response_hook({"x-ms-request-charge": str(WriteCharge)}, doc)
+        return copy.deepcopy(doc)
+
+    def find(self, item, partition_key):
+        id = item['id'] if isinstance(item, dict) else item
+        doc = self.docs.get((partition_key, id))
+        if doc is None:
+            raise notFound(id)
+        return doc
+
+    async def read(self, response_hook=None, **kwargs):
+        await self.delay()
+        return {"id": self.id, "partitionKey": {"paths": [self.partitionKeyPath], "kind": "Hash"}}
+
+    async def read_item(self, item, partition_key, response_hook=None, **kwargs):
+        await self.delay()
+        doc = self.find(item, partition_key)
+        if response_hook is not None:
+            response_hook({"x-ms-request-charge": str(ReadCharge)}, doc)
+        return copy.deepcopy(doc)
+
+    async def create_item(self, body, enable_automatic_id_generation=False, response_hook=None, **kwargs):
+        await self.delay()
+        if 'id' not in body:
+            if not enable_automatic_id_generation:
+                raise ValueError("id is required")
+            body = dict(body, id=str(uuid.uuid4()))
+        if (self.partitionKeyOf(body), body['id']) in self.docs:
+            raise CosmosResourceExistsError(status_code=409, message=f"Resource {body['id']} already exists")
+        return self.store(body, response_hook)
+
+    async def upsert_item(self, body, response_hook=None, **kwargs):
+        await self.delay()
+        return self.store(body, response_hook)
+
+    async def replace_item(self, item, body, etag=None, match_condition=None, response_hook=None, **kwargs):
+        await self.delay()
+        doc = self.find(item, self.partitionKeyOf(body))
+        if etag is not None and doc['_etag'] != etag:
+            raise CosmosAccessConditionFailedError(status_code=412, message="Precondition failed")
+        return self.store(body, response_hook)
+
+    async def delete_item(self, item, partition_key, response_hook=None, **kwargs):
+        await self.delay()
+        doc = self.find(item, partition_key)
+        del self.docs[(partition_key, doc['id'])]
+        if response_hook is not None:
+            response_hook({"x-ms-request-charge": str(WriteCharge)}, None)
+
+    async def patch_item(self, item, partition_key, patch_operations, response_hook=None, **kwargs):
+        await self.delay()
+        doc = copy.deepcopy(self.find(item, partition_key))
+        for operation in patch_operations:
+            field = operation['path'].strip("/")
+            if operation['op'] == "incr":
+                doc[field] = doc.get(field, 0) + operation['value']
+            elif operation['op'] in ["set", "add", "replace"]:
+                doc[field] = operation['value']
+            else:
+                raise NotImplementedError(f"Fake Cosmos: unsupported patch operation {operation['op']}")
+        return self.store(doc, response_hook)
+
+    async def execute_item_batch(self, batch_operations, partition_key, response_hook=None, **kwargs):
+        await self.delay()
+        # all or nothing, like a transactional batch
+        docs = dict(self.docs)
+        results = []
+        for index, (operation, args) in enumerate(batch_operations):
+            try:
+                if operation == "create":
+                    if (partition_key, args[0]['id']) in self.docs:
+                        raise CosmosResourceExistsError(status_code=409, message="Conflict")
+                    results.append(self.store(args[0], None))
+                elif operation == "upsert":
+                    results.append(self.store(args[0], None))
+                elif operation == "delete":
+                    self.find(args[0], partition_key)
+                    del self.docs[(partition_key, args[0])]
+                    results.append({})
+                else:
+                    raise NotImplementedError(f"Fake Cosmos: unsupported batch operation {operation}")
+            except (CosmosResourceExistsError, CosmosResourceNotFoundError) as e:
+                self.docs = docs
+                raise CosmosBatchOperationError(error_index=index, headers={}, status_code=e.status_code,
+                                                message=f"Batch operation {index} failed", operation_responses=[])
+        if response_hook is not None:
+            response_hook({"x-ms-request-charge": str(WriteCharge * len(batch_operations))}, results)
+        return results
+
+    def query_items(self, query, parameters=None, partition_key=None, max_item_count=None, response_hook=None, **kwargs):
+        docs = [doc for (key, id), doc in self.docs.items() if partition_key is None or key == partition_key]
+        return FakeResults(self, runQuery(query, parameters, docs), max_item_count, response_hook)
+
+    def read_all_items(self, max_item_count=None, response_hook=None, **kwargs):
+        return FakeResults(self, copy.deepcopy(list(self.docs.values())), max_item_count, response_hook)
+
+class FakeDatabase:
+    """
+    database of FakeContainers, partitioned by partitionKeys[name] (default /id)
+    """
+    def __init__(self, partitionKeys=None, latency=0.0):
+        self.partitionKeys = partitionKeys or {}
+        self.latency = latency
+        self.containers = {}
+
+    def get_container_client(self, name):
+        if name not in self.containers:
+            self.containers[name] = FakeContainer(name, self.partitionKeys.get(name, "/id"), self.latency)
+        return self.containers[name]
+
+def detectLanguage(text):
+    """
+    stand-in language detection: Spanish punctuation is es, other accents it (unsupported), otherwise en
+    """
+    if any(c in text for c in "¿¡ñ"):
+        return "es", 1.0
+    if any(ord(c) > 127 for c in text):
+        return "it", 0.9
+    return "en", 1.0
+
+def translatorTransport(latency=0.0):
+    """
+    httpx transport answering Translator translate requests (with detection) without the service
+    """
+    import httpx
+
+    async def handle(request):
+        if latency > 0:
+            await asyncio.sleep(latency)
+        texts = [item['text'] for item in json.loads(request.content)]
+        to = request.url.params.get_list("to")
+        results = []
+        for text in texts:
+            language, score = detectLanguage(text)
+            results.append({
+                "detectedLanguage": {"language": language, "score": score},
+                "translations": [{"to": lang, "text": text if lang == language else f"[{lang}] {text}"} for lang in to]
+            })
+        return httpx.Response(200, json=results)
+
+    return httpx.MockTransport(handle)
+
+class FakeCompletions:
+    def __init__(self, latency):
+        self.latency = latency
+
+    async def create(self, model, messages, n=1, **kwargs):
+        if self.latency > 0:
+            await asyncio.sleep(self.latency)
+        match = re.search(r"keyword '([^']*)'", messages[-1]['content'])
+        keyword = match.group(1) if match else "Quiplash"
+        contents = [f"What is the worst thing to say about {keyword}? (idea {i + 1})" for i in range(n)]
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content)) for content in contents])
+
+class FakeOpenAI:
+    """
+    stand-in for AsyncAzureOpenAI chat completions, suggestions always include the keyword
+    """
+    def __init__(self, latency=0.0):
+        self.chat = SimpleNamespace(completions=FakeCompletions(latency))
@@ -0,0 +1,23 @@
+import json
+
+# orjson is several times faster than json for encoding and decoding, fall back to json where it is not installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def dumps(obj):
+    """
+    returns obj encoded as UTF-8 JSON bytes
+    """
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode("utf-8")
+
+def loads(data):
+    """
+    returns the object decoded from JSON bytes or str
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -0,0 +1,189 @@
+import logging
+
+from azure.core import MatchConditions
+from azure.cosmos.exceptions import CosmosAccessConditionFailedError, CosmosResourceExistsError, CosmosResourceNotFoundError
+
+from shared_code import FastJson, Podium, Metrics
+from shared_code.Player import Player
+
+# id of the single leaderboard document
+LeaderboardId = "podium"
+
+# Cosmos rejects items over 2 MB, leave room for the system properties
+MaxDocumentBytes = 1900000
+
+class Leaderboard:
+    """
+    materialized view of the players at the top of the podium
+
+    invariant: every player with ppgr >= floor is on the board (floor None means every player is)
+    so as long as the board holds at least 3 ppgr tiers its podium is exactly the full scan podium
+    """
+    def __init__(self, players=None, floor=None):
+        # username -> (games_played, total_score)
+        self.players = players if players is not None else {}
+        self.floor = floor
+
+    @classmethod
+    def fromDocument(cls, doc):
+        players = {p['username']: (p['games_played'], p['total_score']) for p in doc.get('players', [])}
+        return cls(players, doc.get('floor'))
+
+    @classmethod
+    def fromPlayers(cls, players, depth):
+        """
+        builds the board from a full scan of players, keeping the top depth ppgr tiers
+        """
+        return cls.fromTiers(Podium.topTiers(players, tiers=depth), depth)
+
+    @classmethod
+    def fromTiers(cls, tiers, depth):
+        """
+        builds the board from the top depth ranked tiers of every player
+        """
+        board = cls({p.username: (p.games_played, p.total_score) for tier in tiers for p in tier})
+        if len(tiers) == depth:
+            # players below the lowest kept tier were dropped
+            board.floor = tiers[-1][0].ppgr()
+        return board
+
+    def toDocument(self):
+        return {
+            "id": LeaderboardId,
+            "floor": self.floor,
+            "players": [{"username": username, "games_played": stats[0], "total_score": stats[1]}
+                        for username, stats in self.players.items()]
+        }
+
+    def fits(self):
+        """
+        returns False if the board is too large to be stored, e.g. many players tied on the podium
+        """
+        return len(FastJson.dumps(self.toDocument())) <= MaxDocumentBytes
+
+    def tierValues(self):
+        return sorted({Podium.pointsPerGame(gp, ts) for gp, ts in self.players.values()}, reverse=True)
+
+    def apply(self, player):
+        """
+        applies the latest games_played/total_score of player
+        returns False if the board can no longer answer the podium and must be rebuilt
+        """
+        username = player['username']
+        games_played = player['games_played']
+        total_score = player['total_score']
+        self.players.pop(username, None)
+        if self.floor is None or Podium.pointsPerGame(games_played, total_score) >= self.floor:
+            self.players[username] = (games_played, total_score)
+        return self.floor is None or len(self.tierValues()) >= len(Podium.PodiumTiers)
+
+    def trim(self, depth, maxPlayers):
+        """
+        drops the lowest tiers while the board is deeper than depth tiers or larger than maxPlayers,
+        never dropping below the podium tiers
+        """
+        values = self.tierValues()
+        while len(values) > len(Podium.PodiumTiers) and (len(values) > depth or len(self.players) > maxPlayers):
+            lowest = values.pop()
+            self.players = {u: s for u, s in self.players.items() if Podium.pointsPerGame(*s) != lowest}
+            self.floor = values[-1]
+
+    def podium(self):
+        players = (Player(None, u, None, s[0], s[1]) for u, s in self.players.items())
+        return Podium.podium(Podium.topTiers(players))
+
+class LeaderboardStore:
+    """
+    reads and maintains the leaderboard document in its own container (azure.cosmos.aio)
+    """
+    def __init__(self, container, playerContainer, depth=10, maxPlayers=1000, retries=10):
+        self.container = container
+        self.playerContainer = playerContainer
+        self.depth = depth
+        self.maxPlayers = maxPlayers
+        self.retries = retries
+
+    async def scan(self):
+        """
+        rebuilds the board from a full scan of the player container
+        """
+        players = self.playerContainer.query_items(
+            query=Podium.PlayerStatsQuery,
+            max_item_count=1000
+        )
+        ranking = Podium.TierRanking(self.depth)
+        async for player in players:
+            ranking.add(player)
+        board = Leaderboard.fromTiers(ranking.tiers(), self.depth)
+        board.trim(self.depth, self.maxPlayers)
+        return board
+
+    async def bootstrap(self):
+        """
+        builds the board from a scan and stores it, returns None if a board was stored during the scan
+        (it may already hold changes the scan missed, so it is kept)
+        a board too large to be stored is returned without storing it, so podiums keep being scanned
+        """
+        board = await self.scan()
+        if not board.fits():
+            logging.warning(f'Leaderboard: {len(board.players)} players on the board, too many to store')
+            return board
+        try:
+            await self.container.create_item(body=board.toDocument())
+        except CosmosResourceExistsError:
+            return None
+        return board
+
+    async def read(self):
+        """
+        returns the stored board, rebuilding and storing it if it does not exist yet
+        """
+        try:
+            return Leaderboard.fromDocument(await self.container.read_item(item=LeaderboardId, partition_key=LeaderboardId))
+        except CosmosResourceNotFoundError:
+            board = await self.bootstrap()
+            if board is not None:
+                return board
+        return Leaderboard.fromDocument(await self.container.read_item(item=LeaderboardId, partition_key=LeaderboardId))
+
+    async def apply(self, players):
+        """
+        applies changed player documents to the stored board
+        uses the document ETag so concurrent change feed batches do not overwrite each other
+        """
+        players = [p for p in players if 'username' in p and 'games_played' in p and 'total_score' in p]
+        if len(players) == 0:
+            return
+
+        for attempt in range(self.retries):
+            try:
+                doc = await self.container.read_item(item=LeaderboardId, partition_key=LeaderboardId)
+            except CosmosResourceNotFoundError:
+                # the scan already sees these changes
+                if await self.bootstrap() is not None:
+                    return
+                # stored by someone else meanwhile, apply the changes to their board
+                continue
+
+            board = Leaderboard.fromDocument(doc)
+            valid = all([board.apply(player) for player in players])
+            if not valid:
+                logging.info('Leaderboard: not enough tiers left, rebuilding from players')
+                board = await self.scan()
+            board.trim(self.depth, self.maxPlayers)
+
+            try:
+                if board.fits():
+                    await self.container.replace_item(item=LeaderboardId, body=board.toDocument(),
+                                                      etag=doc['_etag'], match_condition=MatchConditions.IfNotModified)
+                else:
+                    # replacing it would fail on every retry, removing it makes podiums scan until it fits again
+                    logging.warning(f'Leaderboard: {len(board.players)} players on the board, too many to store')
+                    await self.container.delete_item(item=LeaderboardId, partition_key=LeaderboardId,
+                                                     etag=doc['_etag'], match_condition=MatchConditions.IfNotModified)
+                return
+            except CosmosAccessConditionFailedError:
+                logging.info(f'Leaderboard: concurrent update, retrying ({attempt + 1})')
+                Metrics.retried(Metrics.cosmosDependency(self.container), "replace_item")
+
+        raise RuntimeError("Leaderboard: too many concurrent updates")
@@ -0,0 +1,259 @@
+import bisect
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import time
+from contextlib import contextmanager
+
+# route (or trigger) of the invocation an outbound call is made for, set by routed
+Route = contextvars.ContextVar("route", default="background")
+
+# Cosmos response headers: request units charged, and 429 retries the SDK made before this response
+ChargeHeader = "x-ms-request-charge"
+RetryHeader = "x-ms-throttle-retry-count"
+
+# latency histogram bucket upper bounds in milliseconds, the last bucket is unbounded
+Buckets = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000]
+
+# emit one structured log record per call
+LogCalls = True
+
+class Histogram:
+    """
+    fixed bucket latency histogram, percentiles are the upper bound of the bucket they fall in
+    """
+    def __init__(self):
+        self.counts = [0] * (len(Buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms):
+        self.counts[bisect.bisect_left(Buckets, ms)] += 1
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    def percentile(self, q):
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(Buckets[i], self.max) if i < len(Buckets) else self.max
+        return self.max
+
+    def report(self):
+        return {
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+            "max": round(self.max, 1),
+            "mean": round(self.total / self.count, 1) if self.count else None
+        }
+
+class Stats:
+    def __init__(self):
+        self.latency = Histogram()
+        self.errors = 0
+        self.charge = 0.0
+        self.retries = 0
+
+# route -> "dependency operation" -> Stats
+Routes = {}
+
+def record(route, dependency, operation, seconds, charge=0.0, retries=0, error=None):
+    """
+    records one call of operation on dependency made for route
+    """
+    stats = Routes.setdefault(route, {}).setdefault(f"{dependency} {operation}", Stats())
+    ms = seconds * 1000
+    stats.latency.add(ms)
+    stats.charge += charge
+    stats.retries += retries
+    if error is not None:
+        stats.errors += 1
+    if LogCalls:
+        logging.info('Metrics: ' + json.dumps({
+            "route": route, "dependency": dependency, "operation": operation, "ms": round(ms, 1),
+            "charge": charge, "retries": retries, "error": error
+        }))
+
+def report():
+    """
+    returns latency percentiles (ms), calls, errors, request charge and retries per route and dependency call
+    """
+    return {route: {name: dict(stats.latency.report(), calls=stats.latency.count, errors=stats.errors,
+                               charge=round(stats.charge, 2), retries=stats.retries)
+                    for name, stats in sorted(calls.items())}
+            for route, calls in sorted(Routes.items())}
+
+def reset():
+    Routes.clear()
+
+class Call:
+    """
+    one outbound call, pass hook as a Cosmos response_hook to record its request charge and retries
+    """
+    def __init__(self, dependency, operation):
+        self.dependency = dependency
+        self.operation = operation
+        self.route = Route.get()
+        self.start = time.perf_counter()
+        self.charge = 0.0
+        self.retries = 0
+        self.error = None
+
+    def hook(self, headers, *args):
+        self.charge += float(headers.get(ChargeHeader) or 0)
+        self.retries += int(headers.get(RetryHeader) or 0)
+
+    def retried(self, count=1):
+        self.retries += count
+
+    def end(self):
+        record(self.route, self.dependency, self.operation, time.perf_counter() - self.start,
+               self.charge, self.retries, self.error)
+
+@contextmanager
+def span(dependency, operation):
+    """
+    records the block as one call of operation on dependency, e.g. span("translator", "translate")
+    """
+    call = Call(dependency, operation)
+    try:
+        yield call
+    except Exception as e:
+        call.error = type(e).__name__
+        raise
+    finally:
+        call.end()
+
+def retried(dependency, operation, count=1):
+    """
+    records retries made by our own code (e.g. ETag conflicts) without a call
+    """
+    stats = Routes.setdefault(Route.get(), {}).setdefault(f"{dependency} {operation}", Stats())
+    stats.retries += count
+
+class PagedCall(Call):
+    """
+    a query, recorded once per page fetched: Cosmos calls the response hook with each page's headers
+    it also calls it once when the query is created, with the headers of whatever request the client made last
+    (maybe for another route), so calls before the first fetch are ignored
+    """
+    def __init__(self, dependency, operation):
+        super().__init__(dependency, operation)
+        self.started = False
+
+    def hook(self, headers, *args):
+        if not self.started:
+            return
+        super().hook(headers, *args)
+        self.end()
+        self.charge = 0.0
+        self.retries = 0
+
+class Pages:
+    """
+    async iterator of query results (items, or pages from by_page) timing each fetch of its PagedCall
+    """
+    def __init__(self, target, call):
+        self.target = target
+        self.call = call
+        self.iterator = None
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.iterator is None:
+            self.iterator = self.target.__aiter__()
+        self.call.started = True
+        self.call.start = time.perf_counter()
+        try:
+            return await self.iterator.__anext__()
+        except StopAsyncIteration:
+            raise
+        except Exception as e:
+            self.call.error = type(e).__name__
+            self.call.end()
+            raise
+
+    def by_page(self, continuation_token=None):
+        return Pages(self.target.by_page(continuation_token), self.call)
+
+    def __getattr__(self, name):
+        # e.g. continuation_token of a page iterator
+        return getattr(self.target, name)
+
+def cosmosDependency(container):
+    """
+    dependency name of the calls made to a Cosmos container, e.g. cosmos/players
+    """
+    return "cosmos/" + str(getattr(container, "id", "container"))
+
+class Instrumented:
+    """
+    proxy of an azure.cosmos.aio container recording every call made through it
+    """
+    def __init__(self, target, dependency=None):
+        self.target = target
+        self.dependency = dependency if dependency is not None else cosmosDependency(target)
+
+    def __getattr__(self, name):
+        attr = getattr(self.target, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            if name.startswith("query_") or name.startswith("read_all_"):
+                paged = PagedCall(self.dependency, name)
+                kwargs.setdefault('response_hook', paged.hook)
+                return Pages(attr(*args, **kwargs), paged)
+            single = Call(self.dependency, name)
+            kwargs.setdefault('response_hook', single.hook)
+            try:
+                result = attr(*args, **kwargs)
+            except Exception as e:
+                single.error = type(e).__name__
+                single.end()
+                raise
+            if inspect.isawaitable(result):
+                return awaited(result, single)
+            single.end()
+            return result
+        return call
+
+async def awaited(result, call):
+    try:
+        return await result
+    except Exception as e:
+        call.error = type(e).__name__
+        raise
+    finally:
+        call.end()
+
+def routed(route):
+    """
+    decorates an async function handler: calls it makes are recorded under route, and so is the invocation itself
+    (as dependency "function"), counting 5xx responses as errors
+    """
+    def decorator(handler):
+        @functools.wraps(handler)
+        async def wrapper(*args, **kwargs):
+            token = Route.set(route)
+            try:
+                with span("function", route) as call:
+                    response = await handler(*args, **kwargs)
+                    if getattr(response, "status_code", 200) >= 500:
+                        call.error = str(response.status_code)
+                    return response
+            finally:
+                Route.reset(token)
+        return wrapper
+    return decorator
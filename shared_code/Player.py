@@ -1,6 +1,11 @@
-import json
+from shared_code import FastJson, Schema
+
+PlayerSchema = Schema.load("player.json")
 
 class Player:
+    # slots keep players small, podium ranking can hold many of them
+    __slots__ = ("id", "username", "password", "games_played", "total_score")
+
     def __init__(self, id, username, password, games_played, total_score):
         self.id = id
         self.username = username
@@ -10,19 +15,46 @@ class Player:
 
     def __str__(self):
         return f"Player: {self.id}, {self.username}, {self.password}, {self.games_played}, {self.total_score}"
-    
+
+    @classmethod
+    def from_dict(cls, doc):
+        """
+        player from a document, fields a projection left out are None
+        """
+        return cls(doc.get('id'), doc.get('username'), doc.get('password'),
+                   doc.get('games_played'), doc.get('total_score'))
+
     def to_dict(self):
-        return {
-            "id": self.id,
+        # no id lets Cosmos generate one
+        doc = {
             "username": self.username,
             "password": self.password,
             "games_played": self.games_played,
             "total_score": self.total_score
         }
-    
+        if self.id is not None:
+            doc["id"] = self.id
+        return doc
+
     def to_json(self):
-        # TODO: check if valid to schema
+        return FastJson.dumps(self.to_dict())
+
+    def stats_dict(self):
+        """
+        public fields of player, as returned by utils/podium
+        """
+        return {"username": self.username, "games_played": self.games_played, "total_score": self.total_score}
+
+    def ppgr(self):
+        """
+        points per game ratio, 0 if no games played
+        """
+        if self.games_played == 0:
+            return 0
+        return self.total_score / self.games_played
 
-        return json.dumps(self.to_dict())
-    
-    # TODO: check if fields are valid to schema
\ No newline at end of file
+    def validate(self):
+        """
+        returns the names of fields that do not match the player schema, empty if player is valid
+        """
+        return Schema.invalidFields(PlayerSchema, self.to_dict())
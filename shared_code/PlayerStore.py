@@ -0,0 +1,197 @@
+from azure.core import MatchConditions
+from azure.cosmos.exceptions import CosmosAccessConditionFailedError, CosmosResourceExistsError, CosmosResourceNotFoundError
+
+from shared_code import Metrics
+
+# legacy layout: Cosmos generates the id, players are found with a cross partition query
+QUERY_MODE = "query"
+# username (escaped by playerId) is the document id and partition key, players are found with a point read
+KEYED_MODE = "keyed"
+
+StorageModes = [QUERY_MODE, KEYED_MODE]
+
+# increments are applied by Cosmos with a partial document update, in one round trip for keyed players
+PATCH_UPDATE = "patch"
+# read, add and replace only if the document is unchanged (ETag), retrying on conflict
+ETAG_UPDATE = "etag"
+
+UpdateModes = [PATCH_UPDATE, ETAG_UPDATE]
+
+# characters Cosmos does not allow in ids, escaped with % in keyed ids (and so is % itself)
+IdEscapes = {c: f"%{ord(c):02X}" for c in "%/\\?#"}
+
+def playerId(username):
+    """
+    returns the keyed layout id (and partition key) of username, the username itself unless it has characters
+    Cosmos does not allow in ids, e.g. bob/smith -> bob%2Fsmith
+    """
+    return "".join(IdEscapes.get(c, c) for c in username)
+
+class PlayerStore:
+    """
+    reads and writes player documents in the player container (azure.cosmos.aio)
+    the storage mode decides how documents are keyed and looked up
+    """
+    def __init__(self, container, mode=QUERY_MODE, updateMode=PATCH_UPDATE, known=None, retries=10):
+        if mode not in StorageModes:
+            raise ValueError(f"Unknown player storage mode: {mode}")
+        if updateMode not in UpdateModes:
+            raise ValueError(f"Unknown player update mode: {updateMode}")
+        self.container = container
+        self.mode = mode
+        self.updateMode = updateMode
+        # optional ExistenceCache of players found or created by this worker
+        self.known = known
+        self.retries = retries
+        self.partitionKeyPath = None
+
+    async def remember(self, player):
+        if self.known is not None:
+            self.known.add(player['username'], player['id'], await self.partitionKeyOf(player))
+
+    async def get(self, username):
+        """
+        returns the player document for username, or None if player does not exist
+        """
+        if not isinstance(username, str):
+            # e.g. missing from the request, no player has it in either mode
+            return None
+        if self.mode == KEYED_MODE:
+            try:
+                id = playerId(username)
+                player = await self.container.read_item(item=id, partition_key=id)
+            except CosmosResourceNotFoundError:
+                return None
+            await self.remember(player)
+            return player
+
+        result = self.container.query_items(
+            query='SELECT * FROM player WHERE player.username = @username',
+            parameters=[dict(name='@username', value=username)]
+        )
+        async for player in result:
+            await self.remember(player)
+            return player
+        return None
+
+    async def locate(self, username):
+        """
+        returns (id, partition key) of the player document for username, or None if player does not exist
+        known players are answered without a round trip
+        """
+        if not isinstance(username, str):
+            return None
+        if self.known is not None:
+            location = self.known.get(username)
+            if location is not None:
+                return location
+
+        if self.mode == KEYED_MODE:
+            player = await self.get(username)
+            return None if player is None else (player['id'], player['id'])
+
+        # only the id and partition key, the rest of the document is not needed
+        partitionKey = "".join(f'["{part}"]' for part in (await self.getPartitionKeyPath()).strip("/").split("/"))
+        result = self.container.query_items(
+            query=f'SELECT player.id, player{partitionKey} AS partitionKey FROM player WHERE player.username = @username',
+            parameters=[dict(name='@username', value=username)]
+        )
+        async for player in result:
+            if self.known is not None:
+                self.known.add(username, player['id'], player['partitionKey'])
+            return player['id'], player['partitionKey']
+        return None
+
+    async def exists(self, username):
+        """
+        returns True if a player with username exists
+        """
+        return await self.locate(username) is not None
+
+    async def create(self, playerDict):
+        """
+        creates player document, returns False if username already exists
+        """
+        username = playerDict['username']
+        if self.mode == KEYED_MODE:
+            # id is the username, so Cosmos rejects duplicates for us in one round trip
+            try:
+                player = await self.container.create_item(body=dict(playerDict, id=playerId(username)))
+            except CosmosResourceExistsError:
+                return False
+            await self.remember(player)
+            return True
+
+        if await self.exists(username):
+            return False
+        player = await self.container.create_item(body=playerDict, enable_automatic_id_generation=True)
+        await self.remember(player)
+        return True
+
+    async def getPartitionKeyPath(self):
+        if self.partitionKeyPath is None:
+            properties = await self.container.read()
+            self.partitionKeyPath = properties['partitionKey']['paths'][0]
+        return self.partitionKeyPath
+
+    async def partitionKeyOf(self, player):
+        """
+        returns the partition key value of player document
+        """
+        if self.mode == KEYED_MODE:
+            return player['id']
+        value = player
+        for part in (await self.getPartitionKeyPath()).strip("/").split("/"):
+            value = value[part]
+        return value
+
+    async def increment(self, username, games_played, total_score):
+        """
+        adds games_played and total_score to player's totals without losing concurrent updates
+        returns False if player does not exist
+        """
+        if self.updateMode == ETAG_UPDATE:
+            return await self.incrementWithEtag(username, games_played, total_score)
+
+        operations = [
+            {"op": "incr", "path": "/games_played", "value": games_played},
+            {"op": "incr", "path": "/total_score", "value": total_score}
+        ]
+        if self.mode == KEYED_MODE:
+            id = playerId(username)
+            try:
+                await self.container.patch_item(item=id, partition_key=id, patch_operations=operations)
+            except CosmosResourceNotFoundError:
+                return False
+            return True
+
+        # a cached location can be stale if the document was removed, look it up again once
+        for attempt in range(2):
+            location = await self.locate(username)
+            if location is None:
+                return False
+            try:
+                await self.container.patch_item(item=location[0], partition_key=location[1], patch_operations=operations)
+                return True
+            except CosmosResourceNotFoundError:
+                if self.known is None:
+                    return False
+                self.known.forget(username)
+        return False
+
+    async def incrementWithEtag(self, username, games_played, total_score):
+        for attempt in range(self.retries):
+            player = await self.get(username)
+            if player is None:
+                return False
+            player['games_played'] += games_played
+            player['total_score'] += total_score
+            try:
+                await self.container.replace_item(item=player['id'], body=player,
+                                                  etag=player['_etag'], match_condition=MatchConditions.IfNotModified)
+                return True
+            except CosmosAccessConditionFailedError:
+                # another update won the race, re-read and add again
+                Metrics.retried(Metrics.cosmosDependency(self.container), "replace_item")
+                continue
+        raise RuntimeError(f"Too many concurrent updates for player {username}")
@@ -0,0 +1,73 @@
+import heapq
+
+from shared_code.Player import Player
+
+# gold, silver and bronze
+PodiumTiers = ["gold", "silver", "bronze"]
+
+# only the fields ranking needs, passwords and system properties stay in Cosmos
+PlayerStatsQuery = 'SELECT player.username, player.games_played, player.total_score FROM player'
+
+def pointsPerGame(games_played, total_score):
+    """
+    returns points per game ratio (ppgr), 0 if no games played
+    """
+    if games_played == 0:
+        return 0
+    return total_score / games_played
+
+class TierRanking:
+    """
+    streaming ranking of players into the top tiers distinct ppgr values
+    only players in the current top tiers are kept, so memory is bounded by the tiers, not the players
+    """
+    def __init__(self, tiers=len(PodiumTiers)):
+        self.maxTiers = tiers
+        # min heap of the ppgr values currently kept, so the lowest tier is evicted first
+        self.heap = []
+        self.members = {}
+
+    def add(self, player):
+        """
+        adds a player document (or Player) to the ranking
+        """
+        if not isinstance(player, Player):
+            player = Player.from_dict(player)
+        ppgr = player.ppgr()
+
+        if ppgr in self.members:
+            self.members[ppgr].append(player)
+        elif len(self.heap) < self.maxTiers:
+            heapq.heappush(self.heap, ppgr)
+            self.members[ppgr] = [player]
+        elif ppgr > self.heap[0]:
+            evicted = heapq.heapreplace(self.heap, ppgr)
+            del self.members[evicted]
+            self.members[ppgr] = [player]
+
+    def tiers(self):
+        """
+        returns the kept tiers, highest ppgr first
+        each tier is a list of Player sorted by increasing games_played, then increasing alphabetical order of username
+        """
+        return [sorted(self.members[ppgr], key=lambda p: (p.games_played, p.username)) for ppgr in sorted(self.members, reverse=True)]
+
+def topTiers(players, tiers=len(PodiumTiers)):
+    """
+    returns the players in the top tiers distinct ppgr values, see TierRanking.tiers
+    players is consumed as a stream
+    """
+    ranking = TierRanking(tiers)
+    for player in players:
+        ranking.add(player)
+    return ranking.tiers()
+
+def podium(tiers):
+    """
+    returns the podium dictionary (gold, silver, bronze lists of players) for ranked tiers
+    """
+    result = {}
+    for i, name in enumerate(PodiumTiers):
+        tier = tiers[i] if i < len(tiers) else []
+        result[name] = [p.stats_dict() for p in tier]
+    return result
@@ -0,0 +1,33 @@
+from shared_code import Schema
+
+PromptSchema = Schema.load("prompt.json")
+TextSchema = PromptSchema["properties"]["texts"]["items"]["properties"]["text"]
+
+class Prompt:
+    # prompt documents as created by prompt/create and prompt/createBulk,
+    # utils/get and prompt/delete only query the fields they need and never build one
+    __slots__ = ("id", "username", "texts")
+
+    def __init__(self, id, username, texts):
+        self.id = id
+        self.username = username
+        # [{language, text}]
+        self.texts = texts
+
+    def __str__(self):
+        return f"Prompt: {self.id}, {self.username}, {self.texts}"
+
+    def to_dict(self):
+        # no id lets Cosmos generate one
+        doc = {"username": self.username, "texts": self.texts}
+        if self.id is not None:
+            doc["id"] = self.id
+        return doc
+
+    @staticmethod
+    def is_valid_text(text):
+        """
+        prompt text written by a player must match the schema (20 to 100 characters)
+        translations are not checked, they can be longer than the original
+        """
+        return Schema.isValid(TextSchema, text)
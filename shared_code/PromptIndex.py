@@ -0,0 +1,101 @@
+import asyncio
+
+from azure.cosmos.exceptions import CosmosBatchOperationError, CosmosResourceNotFoundError
+
+# operations per transactional batch allowed by Cosmos
+MaxBatchSize = 100
+
+def entryId(promptId, language):
+    return f"{promptId}:{language}"
+
+def entries(prompt):
+    """
+    returns the index documents of a prompt document, one per language, keyed by the prompt's username
+    only the first text in each language is indexed
+    """
+    result = {}
+    for text in prompt.get('texts', []):
+        language = text.get('language')
+        if language not in result:
+            result[language] = {
+                "id": entryId(prompt['id'], language),
+                "username": prompt['username'],
+                "promptId": prompt['id'],
+                "language": language,
+                "text": text.get('text')
+            }
+    return list(result.values())
+
+class PromptIndex:
+    """
+    per language index of prompts in its own container (azure.cosmos.aio), partitioned by /username
+    kept up to date from the prompt container change feed, deletions are applied by prompt/delete
+    since the change feed does not report them
+    """
+    def __init__(self, container, promptContainer, maxConcurrency=4):
+        self.container = container
+        self.promptContainer = promptContainer
+        self.limit = asyncio.Semaphore(maxConcurrency)
+
+    def query(self, username, language, **kwargs):
+        """
+        queries {id, text} of the prompts authored by username in language, a single partition indexed read
+        """
+        return self.container.query_items(
+            query='SELECT entry.promptId AS id, entry.text FROM entry WHERE entry.language = @language',
+            parameters=[dict(name='@language', value=language)],
+            partition_key=username,
+            **kwargs
+        )
+
+    async def batch(self, username, operations):
+        async with self.limit:
+            for i in range(0, len(operations), MaxBatchSize):
+                await self.container.execute_item_batch(batch_operations=operations[i:i + MaxBatchSize],
+                                                        partition_key=username)
+
+    async def apply(self, prompts):
+        """
+        indexes changed prompt documents
+        a prompt can be deleted before its change is indexed, so entries of prompts that no longer exist are removed again
+        """
+        byPlayer = {}
+        for prompt in prompts:
+            if 'id' in prompt and 'username' in prompt:
+                byPlayer.setdefault(prompt['username'], []).append(prompt)
+
+        async def applyPlayer(username, playerPrompts):
+            await self.batch(username, [("upsert", (entry,)) for prompt in playerPrompts for entry in entries(prompt)])
+            ids = [prompt['id'] for prompt in playerPrompts]
+            result = self.promptContainer.query_items(
+                query='SELECT VALUE prompt.id FROM prompt WHERE ARRAY_CONTAINS(@ids, prompt.id)',
+                parameters=[dict(name='@ids', value=ids)],
+                partition_key=username
+            )
+            existing = {id async for id in result}
+            deleted = [id for id in ids if id not in existing]
+            if deleted:
+                await self.delete(username, deleted)
+
+        await asyncio.gather(*[applyPlayer(username, playerPrompts) for username, playerPrompts in byPlayer.items()])
+
+    async def delete(self, username, promptIds):
+        """
+        removes the entries of prompts promptIds of username, returns number of entries removed
+        """
+        result = self.container.query_items(
+            query='SELECT VALUE entry.id FROM entry WHERE ARRAY_CONTAINS(@ids, entry.promptId)',
+            parameters=[dict(name='@ids', value=list(promptIds))],
+            partition_key=username
+        )
+        ids = [id async for id in result]
+        try:
+            await self.batch(username, [("delete", (id,)) for id in ids])
+        except CosmosBatchOperationError:
+            # an entry was already removed (e.g. by the change feed), remove the rest one by one
+            for id in ids:
+                try:
+                    await self.container.delete_item(item=id, partition_key=username)
+                except CosmosResourceNotFoundError:
+                    pass
+        return len(ids)
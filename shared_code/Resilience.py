@@ -0,0 +1,250 @@
+import asyncio
+import contextvars
+import inspect
+import math
+import random
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+
+from shared_code import Metrics
+
+# monotonic time by which the current request must have answered, None for no deadline
+Deadline = contextvars.ContextVar("deadline", default=None)
+
+# statuses worth retrying: throttled, retry with, timeouts and unavailable servers
+RetryableStatus = {408, 429, 449, 500, 502, 503, 504}
+
+class Unavailable(Exception):
+    """
+    a dependency cannot answer in time: its circuit is open, retries ran out or the request deadline passed
+    routes answer 503 with retryAfter (seconds) as Retry-After
+    """
+    def __init__(self, message, retryAfter=1.0):
+        super().__init__(message)
+        self.retryAfter = retryAfter
+
+@contextmanager
+def deadline(seconds):
+    """
+    calls in the block give up once seconds have passed
+    """
+    token = Deadline.set(time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        Deadline.reset(token)
+
+def remaining():
+    """
+    seconds left before the request deadline, infinite without one
+    """
+    end = Deadline.get()
+    return math.inf if end is None else end - time.monotonic()
+
+def statusOf(error):
+    """
+    HTTP status of a Cosmos, httpx or openai error, None for errors without one (e.g. connection errors)
+    """
+    status = getattr(error, "status_code", None)
+    if status is None and getattr(error, "response", None) is not None:
+        status = getattr(error.response, "status_code", None)
+    return status
+
+def retryAfterOf(error):
+    """
+    seconds the service asked to wait before retrying, from x-ms-retry-after-ms or Retry-After, or None
+    """
+    headers = getattr(error, "headers", None)
+    if headers is None and getattr(error, "response", None) is not None:
+        headers = getattr(error.response, "headers", None)
+    if not headers:
+        return None
+    headers = {str(name).lower(): value for name, value in headers.items()}
+    try:
+        if headers.get("x-ms-retry-after-ms"):
+            return float(headers["x-ms-retry-after-ms"]) / 1000
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            value = headers["retry-after"]
+            try:
+                return float(value)
+            except ValueError:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+    return None
+
+class CircuitBreaker:
+    """
+    stops calling a failing dependency: after failureThreshold consecutive failures the circuit opens and calls
+    fail fast for resetSeconds, then one trial call is let through (half open) and closes it again if it succeeds
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half open"
+
+    def __init__(self, name, failureThreshold=5, resetSeconds=30):
+        self.name = name
+        self.failureThreshold = failureThreshold
+        self.resetSeconds = resetSeconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.openedAt = 0.0
+        self.opened = 0
+        self.rejected = 0
+
+    def before(self):
+        """
+        raises Unavailable if the dependency should not be called now
+        """
+        if self.state == self.CLOSED:
+            return
+        waited = time.monotonic() - self.openedAt
+        if self.state == self.OPEN and waited >= self.resetSeconds:
+            self.state = self.HALF_OPEN
+            return
+        self.rejected += 1
+        raise Unavailable(f"{self.name} circuit is {self.state}", retryAfter=max(1.0, self.resetSeconds - waited))
+
+    def success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+
+    def failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failureThreshold:
+            if self.state != self.OPEN:
+                self.opened += 1
+            self.state = self.OPEN
+            self.openedAt = time.monotonic()
+
+    def stats(self):
+        return {"state": self.state, "failures": self.failures, "opened": self.opened, "rejected": self.rejected}
+
+class RetryPolicy:
+    """
+    retries transient failures with jittered exponential backoff, waiting what the service asks for when it says,
+    and never past the request deadline
+    transient: exception types without a status that are worth retrying (e.g. timeouts)
+    """
+    def __init__(self, name, attempts=4, baseSeconds=0.1, maxSeconds=2.0, retryableStatus=RetryableStatus,
+                 transient=(asyncio.TimeoutError,)):
+        self.name = name
+        self.attempts = attempts
+        self.baseSeconds = baseSeconds
+        self.maxSeconds = maxSeconds
+        self.retryableStatus = retryableStatus
+        self.transient = transient
+
+    def isTransient(self, error):
+        if isinstance(error, self.transient):
+            return True
+        return statusOf(error) in self.retryableStatus
+
+    def backoff(self, attempt):
+        """
+        full jitter: uniform between 0 and the exponential backoff of attempt
+        """
+        return random.uniform(0, min(self.maxSeconds, self.baseSeconds * 2 ** attempt))
+
+    async def call(self, operation, name, breaker=None):
+        """
+        awaits operation() (a new awaitable per attempt), retrying transient failures
+        raises Unavailable when the circuit is open, retries run out or the deadline passes
+        """
+        for attempt in range(self.attempts):
+            if breaker is not None:
+                breaker.before()
+            left = remaining()
+            if left <= 0:
+                raise Unavailable(f"{self.name} {name}: request deadline passed")
+            try:
+                result = operation()
+                if inspect.isawaitable(result):
+                    result = await (result if left == math.inf else asyncio.wait_for(result, left))
+                if breaker is not None:
+                    breaker.success()
+                return result
+            except Exception as error:
+                if isinstance(error, asyncio.TimeoutError) and remaining() <= 0:
+                    # the request deadline passed during the call, which is not retried (a write may have applied)
+                    if breaker is not None:
+                        breaker.failure()
+                    raise Unavailable(f"{self.name} {name}: request deadline passed") from error
+                if not self.isTransient(error):
+                    # the dependency answered, the request itself was wrong
+                    if breaker is not None:
+                        breaker.success()
+                    raise
+                if breaker is not None:
+                    breaker.failure()
+                retryAfter = retryAfterOf(error)
+                delay = retryAfter if retryAfter is not None else self.backoff(attempt)
+                if attempt + 1 == self.attempts or delay >= remaining():
+                    raise Unavailable(f"{self.name} {name}: {type(error).__name__} after {attempt + 1} attempts",
+                                      retryAfter=max(1.0, delay)) from error
+                Metrics.retried(self.name, name)
+                await asyncio.sleep(delay)
+
+class Bounded:
+    """
+    async iterator of query results (items, or pages from by_page) giving up at the request deadline
+    """
+    def __init__(self, target, name):
+        self.target = target
+        self.name = name
+        self.iterator = None
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.iterator is None:
+            self.iterator = self.target.__aiter__()
+        left = remaining()
+        if left == math.inf:
+            return await self.iterator.__anext__()
+        if left <= 0:
+            raise Unavailable(f"{self.name}: request deadline passed")
+        try:
+            return await asyncio.wait_for(self.iterator.__anext__(), left)
+        except asyncio.TimeoutError as error:
+            raise Unavailable(f"{self.name}: request deadline passed") from error
+
+    def by_page(self, continuation_token=None):
+        return Bounded(self.target.by_page(continuation_token), self.name)
+
+    def __getattr__(self, name):
+        # e.g. continuation_token of a page iterator
+        return getattr(self.target, name)
+
+class Resilient:
+    """
+    proxy of an azure.cosmos.aio container retrying single item calls (reads, writes and batches)
+    reads use policy, writes use writePolicy: a write that failed may still have been applied, so it must only be
+    retried for statuses proving it was not (e.g. throttled), never for timeouts or unavailable servers
+    queries are left to the SDK, which already waits out throttling while iterating, but give up at the deadline
+    """
+    # calls that are safe to repeat whatever happened to the first attempt
+    Reads = {"read_item", "read"}
+
+    def __init__(self, target, policy, writePolicy=None):
+        self.target = target
+        self.policy = policy
+        self.writePolicy = writePolicy if writePolicy is not None else policy
+
+    def __getattr__(self, name):
+        attr = getattr(self.target, name)
+        if not callable(attr):
+            return attr
+        if name.startswith("query_") or name.startswith("read_all_"):
+            def query(*args, **kwargs):
+                return Bounded(attr(*args, **kwargs), f"{self.policy.name} {name}")
+            return query
+        policy = self.policy if name in self.Reads else self.writePolicy
+
+        async def call(*args, **kwargs):
+            return await policy.call(lambda: attr(*args, **kwargs), name)
+        return call
@@ -0,0 +1,55 @@
+import json
+from pathlib import Path
+
+# JSON schema types used by the schemas in shared_code
+Types = {
+    "string": str,
+    "integer": int,
+    "number": (int, float),
+    "array": list,
+    "object": dict
+}
+
+def load(name):
+    """
+    returns the JSON schema stored next to this module as name (e.g. player.json)
+    """
+    with open(Path(__file__).parent / name) as schema_file:
+        return json.load(schema_file)
+
+def isValid(schema, value):
+    """
+    returns True if value satisfies schema
+    supports the keywords used by the schemas in shared_code: type, minLength, maxLength, minimum,
+    properties, required, items, minItems and uniqueItems
+    """
+    expected = Types.get(schema.get("type"))
+    if expected is not None and (not isinstance(value, expected) or isinstance(value, bool)):
+        return False
+    if isinstance(value, str):
+        if len(value) < schema.get("minLength", 0) or len(value) > schema.get("maxLength", len(value)):
+            return False
+    if isinstance(value, (int, float)) and "minimum" in schema and value < schema["minimum"]:
+        return False
+    if isinstance(value, dict):
+        return len(invalidFields(schema, value)) == 0
+    if isinstance(value, list):
+        if len(value) < schema.get("minItems", 0):
+            return False
+        if schema.get("uniqueItems") and len({json.dumps(item, sort_keys=True) for item in value}) < len(value):
+            return False
+        return all(isValid(schema.get("items", {}), item) for item in value)
+    return True
+
+def invalidFields(schema, doc):
+    """
+    returns the names of the properties of doc that are missing or do not satisfy schema, in schema order
+    """
+    invalid = []
+    for name, propertySchema in schema.get("properties", {}).items():
+        if name not in doc:
+            if name in schema.get("required", []):
+                invalid.append(name)
+        elif not isValid(propertySchema, doc[name]):
+            invalid.append(name)
+    return invalid
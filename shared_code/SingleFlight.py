@@ -0,0 +1,62 @@
+import asyncio
+import time
+
+class SingleFlight:
+    """
+    shares one computation of a value between concurrent callers, and keeps the result for ttl seconds
+    a failed computation is not kept, every caller waiting for it gets the error
+    used from a single event loop, so it needs no lock
+    """
+    def __init__(self, compute, ttl=0):
+        # await compute() returns the value
+        self.compute = compute
+        self.ttl = ttl
+        self.value = None
+        self.expires = 0.0
+        self.inflight = None
+        # bumped by invalidate, a computation started before it is neither cached nor shared
+        self.generation = 0
+        self.hits = 0
+        self.coalesced = 0
+        self.computations = 0
+
+    async def get(self):
+        if self.expires > time.monotonic():
+            self.hits += 1
+            return self.value
+        if self.inflight is None:
+            self.computations += 1
+            self.inflight = asyncio.ensure_future(self.run(self.generation))
+        else:
+            self.coalesced += 1
+        # shielded, so a caller that gives up does not cancel the computation for the others
+        return await asyncio.shield(self.inflight)
+
+    async def run(self, generation):
+        try:
+            value = await self.compute()
+            if self.ttl > 0 and generation == self.generation:
+                self.value = value
+                self.expires = time.monotonic() + self.ttl
+            return value
+        finally:
+            if generation == self.generation:
+                self.inflight = None
+
+    def invalidate(self):
+        """
+        the next get computes the value again, a computation already running may have read the old state,
+        so its callers still get its result but it is not cached or shared with later callers
+        """
+        self.generation += 1
+        self.value = None
+        self.expires = 0.0
+        self.inflight = None
+
+    def stats(self):
+        return {
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "coalesced": self.coalesced,
+            "computations": self.computations
+        }
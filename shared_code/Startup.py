@@ -0,0 +1,28 @@
+import logging
+import time
+from contextlib import contextmanager
+
+# dependency -> {phase ("import" or "init"): seconds}
+Timings = {}
+
+@contextmanager
+def timed(dependency, phase):
+    """
+    records how long the block takes as the phase of dependency, e.g. timed("openai", "import")
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        phases = Timings.setdefault(dependency, {})
+        phases[phase] = phases.get(phase, 0) + elapsed
+        logging.info(f'Startup: {dependency} {phase} took {elapsed * 1000:.1f} ms')
+
+def report():
+    """
+    returns import and init cost per dependency in milliseconds, most expensive first
+    """
+    rows = {dependency: {phase: round(seconds * 1000, 1) for phase, seconds in phases.items()}
+            for dependency, phases in Timings.items()}
+    return dict(sorted(rows.items(), key=lambda row: -sum(row[1].values())))
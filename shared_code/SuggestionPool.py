@@ -0,0 +1,102 @@
+import asyncio
+import logging
+from collections import OrderedDict, deque
+
+def normalize(keyword):
+    return keyword.strip().casefold()
+
+class SuggestionPool:
+    """
+    pool of valid, unused suggestions per normalized keyword
+    suggestions are served from the pool and the pool is refilled in the background when it drains below minSize,
+    only a keyword with an empty pool waits for the model
+
+    used from a single event loop, so pool state needs no lock
+    """
+    def __init__(self, generate, isValid, minSize=2, maxSize=12, maxKeywords=1000):
+        # await generate(keyword) returns a list of candidate suggestions, isValid(suggestion, keyword) checks one
+        self.generate = generate
+        self.isValid = isValid
+        self.minSize = minSize
+        self.maxSize = maxSize
+        self.maxKeywords = maxKeywords
+        # normalized keyword -> deque of suggestions, least recently used keyword first
+        self.pools = OrderedDict()
+        # normalized keyword -> running refill task, the loop only keeps weak references to tasks
+        self.refilling = {}
+        self.hits = 0
+        self.misses = 0
+        self.refills = 0
+
+    async def take(self, keyword):
+        """
+        returns a valid suggestion for keyword, or None if the model could not generate one
+        """
+        key = normalize(keyword)
+        suggestion = self.takePooled(key, keyword)
+        if suggestion is not None:
+            self.hits += 1
+            self.refillIfLow(key, keyword)
+            return suggestion
+
+        self.misses += 1
+        candidates = await self.validCandidates(keyword)
+        if len(candidates) == 0:
+            return None
+        self.add(key, candidates[1:])
+        self.refillIfLow(key, keyword)
+        return candidates[0]
+
+    def takePooled(self, key, keyword):
+        pool = self.pools.get(key)
+        if pool is None:
+            return None
+        self.pools.move_to_end(key)
+        # pooled suggestions were valid for a keyword with the same normalized form, recheck for this one
+        for suggestion in pool:
+            if self.isValid(suggestion, keyword):
+                pool.remove(suggestion)
+                return suggestion
+        return None
+
+    async def validCandidates(self, keyword):
+        candidates = []
+        for suggestion in await self.generate(keyword):
+            if suggestion and self.isValid(suggestion, keyword) and suggestion not in candidates:
+                candidates.append(suggestion)
+        return candidates
+
+    def add(self, key, suggestions):
+        pool = self.pools.setdefault(key, deque())
+        self.pools.move_to_end(key)
+        for suggestion in suggestions:
+            if len(pool) >= self.maxSize:
+                break
+            if suggestion not in pool:
+                pool.append(suggestion)
+        while len(self.pools) > self.maxKeywords:
+            self.pools.popitem(last=False)
+
+    def refillIfLow(self, key, keyword):
+        pool = self.pools.get(key)
+        if (pool is not None and len(pool) >= self.minSize) or key in self.refilling:
+            return
+        self.refilling[key] = asyncio.get_running_loop().create_task(self.refill(key, keyword))
+
+    async def refill(self, key, keyword):
+        try:
+            self.add(key, await self.validCandidates(keyword))
+            self.refills += 1
+        except Exception:
+            logging.exception(f'Suggestion pool: refill failed for {keyword}')
+        finally:
+            self.refilling.pop(key, None)
+
+    def stats(self):
+        return {
+            "keywords": len(self.pools),
+            "suggestions": sum(len(pool) for pool in self.pools.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "refills": self.refills
+        }
@@ -0,0 +1,111 @@
+import hashlib
+import logging
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+
+from azure.cosmos.exceptions import CosmosHttpResponseError, CosmosResourceNotFoundError
+
+from shared_code import Resilience
+
+def normalize(text):
+    """
+    returns text in NFC form with surrounding whitespace removed and inner whitespace collapsed
+    """
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+class TranslationCache:
+    """
+    LRU cache of translation results with a time to live, keyed on the normalized text and target languages
+    when a container (azure.cosmos.aio) is given, results are also stored in Cosmos so they survive worker recycling
+    used from a single event loop, so it needs no lock
+    """
+    def __init__(self, maxSize=1024, ttl=86400, container=None):
+        self.maxSize = maxSize
+        self.ttl = ttl
+        self.container = container
+        # key -> (expires, result), least recently used first
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.storeHits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, text, languages):
+        return normalize(text) + "|" + ",".join(sorted(languages))
+
+    def documentId(self, key):
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    async def get(self, text, languages):
+        """
+        returns the cached result for text translated to languages, or None
+        """
+        key = self.key(text, languages)
+        entry = self.entries.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            del self.entries[key]
+
+        result = await self.getStored(key)
+        if result is None:
+            self.misses += 1
+            return None
+        self.storeHits += 1
+        self.remember(key, result)
+        return result
+
+    async def getStored(self, key):
+        if self.container is None:
+            return None
+        id = self.documentId(key)
+        try:
+            doc = await self.container.read_item(item=id, partition_key=id)
+        except CosmosResourceNotFoundError:
+            return None
+        except (CosmosHttpResponseError, Resilience.Unavailable) as error:
+            # the store is only a cache, the text is translated instead
+            logging.warning(f'Translation cache: stored result not read: {error}')
+            return None
+        if doc.get('expires', 0) <= time.time():
+            return None
+        return doc.get('result')
+
+    async def put(self, text, languages, result):
+        """
+        caches result for text translated to languages
+        """
+        key = self.key(text, languages)
+        self.remember(key, result)
+        if self.container is not None:
+            id = self.documentId(key)
+            # ttl lets Cosmos remove expired results when the container has TTL enabled
+            try:
+                await self.container.upsert_item(body={"id": id, "result": result,
+                                                       "expires": time.time() + self.ttl, "ttl": int(self.ttl)})
+            except (CosmosHttpResponseError, Resilience.Unavailable) as error:
+                logging.warning(f'Translation cache: result not stored: {error}')
+
+    def remember(self, key, result):
+        self.entries[key] = (time.monotonic() + self.ttl, result)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxSize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self):
+        """
+        returns hit/miss counters and current size, for sizing the cache
+        """
+        return {
+            "size": len(self.entries),
+            "maxSize": self.maxSize,
+            "hits": self.hits,
+            "storeHits": self.storeHits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
@@ -0,0 +1,79 @@
+import asyncio
+
+import httpx
+
+from shared_code import Metrics, Resilience
+
+# service limits per translate request: array elements, and characters counted once per target language
+MaxElements = 1000
+MaxCharacters = 50000
+
+# failures without a status worth retrying, statuses are checked by the retry policy
+Transient = (httpx.TransportError, asyncio.TimeoutError)
+
+class Translator:
+    """
+    async client for the Azure Text Translation service
+    one keep-alive connection pool is shared by every call, so only the first call pays the TCP/TLS handshake
+    """
+    def __init__(self, endpoint, key, region, poolSize=10, connectTimeout=3.05, readTimeout=10, transport=None,
+                 policy=None, breaker=None):
+        self.endpoint = endpoint
+        self.client = httpx.AsyncClient(
+            headers={
+                "Ocp-Apim-Subscription-Key": key,
+                "Content-Type": "application/json",
+                "Ocp-Apim-Subscription-Region": region
+            },
+            limits=httpx.Limits(max_connections=poolSize, max_keepalive_connections=poolSize),
+            timeout=httpx.Timeout(readTimeout, connect=connectTimeout),
+            # only set to answer requests without the service, e.g. Fakes.translatorTransport
+            transport=transport
+        )
+        # retries throttled (429) and failed requests, waiting for Retry-After when the service sends one
+        self.policy = policy if policy is not None else Resilience.RetryPolicy("translator", transient=Transient)
+        # optional Resilience.CircuitBreaker, fails fast while the service is down
+        self.breaker = breaker
+
+    async def post(self, path, params, texts):
+        body = [{"text": text} for text in texts]
+
+        async def attempt():
+            with Metrics.span("translator", path):
+                response = await self.client.post(self.endpoint + path, params=params, json=body)
+                # error responses raise instead of being read as results
+                response.raise_for_status()
+            return response.json()
+        return await self.policy.call(attempt, path, self.breaker)
+
+    async def detectAndTranslate(self, texts, to):
+        """
+        translates each of texts to every language in to with one request, letting the service detect the source
+        returns [{language, score, translations: {language: text}}] for each of texts
+        """
+        params = {"api-version": "3.0", "to": to}
+        results = []
+        for response in await self.post("translate", params, texts):
+            detected = response['detectedLanguage']
+            translations = {translation['to']: translation['text'] for translation in response['translations']}
+            results.append({"language": detected['language'], "score": detected['score'], "translations": translations})
+        return results
+
+    def batches(self, texts, targetCount):
+        """
+        splits texts, in order, into as few translate requests to targetCount languages as the service limits allow
+        """
+        batches = []
+        batch = []
+        characters = 0
+        for text in texts:
+            size = len(text) * targetCount
+            if batch and (len(batch) >= MaxElements or characters + size > MaxCharacters):
+                batches.append(batch)
+                batch = []
+                characters = 0
+            batch.append(text)
+            characters += size
+        if batch:
+            batches.append(batch)
+        return batches
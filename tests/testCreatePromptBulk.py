@@ -0,0 +1,94 @@
+import unittest
+import requests
+import json
+from azure.cosmos import CosmosClient
+
+from pathlib import Path
+
+class TestCreatePromptBulk(unittest.TestCase):
+    LOCAL_DEV_URL = "http://localhost:7071/"
+    PUBLIC_URL = "https://quiplash-2425-bv1g22.azurewebsites.net/"
+    TEST_FUNCTION = "prompt/createBulk"
+    TEST_URL = PUBLIC_URL + TEST_FUNCTION
+
+    pathToSettings = Path(__file__).parent.parent / 'local.settings.json'
+    with open(pathToSettings) as settings_file:
+        settings = json.load(settings_file)
+
+    MyCosmos = CosmosClient.from_connection_string(settings['Values']['AzureCosmosDBConnectionString'])
+    QuiplashDBProxy = MyCosmos.get_database_client(settings['Values']['DatabaseName'])
+    PlayerContainerProxy = QuiplashDBProxy.get_container_client(settings['Values']['PlayerContainerName'])
+    PromptContainerProxy = QuiplashDBProxy.get_container_client(settings['Values']['PromptContainerName'])
+    FunctionAppKey = settings['Values']['FunctionAppKey']
+
+    player = {
+        "username": "bryanvullo",
+        "password": "password123"
+    }
+    prompts = {
+        "username": "bryanvullo",
+        "texts": [
+            # valid
+            "What is the best food?",
+            # too short
+            "What?",
+            # unsupported language
+            "Qual è il miglior cibo?",
+            # supported language
+            "¿Cuál es la mejor comida?"
+        ]
+    }
+
+    def setUp(self):
+        '''
+        Register a player before testing
+        '''
+        REGISTER_URL = self.TEST_URL.replace("prompt/createBulk", "player/register")
+        requests.post(REGISTER_URL, json=self.player,
+                      headers={"x-functions-key": self.FunctionAppKey} )
+
+    def tearDown(self):
+        '''
+        Delete the player and prompts after testing
+        '''
+        for doc in self.PlayerContainerProxy.read_all_items():
+          self.PlayerContainerProxy.delete_item(item=doc, partition_key=doc['id'])
+        for doc in self.PromptContainerProxy.read_all_items():
+          self.PromptContainerProxy.delete_item(item=doc, partition_key=doc['username'])
+
+    def testBulkCreate(self):
+        '''
+        Test valid texts are created and invalid ones reported
+        '''
+        response = requests.post(self.TEST_URL, json=self.prompts,
+                                 headers={"x-functions-key": self.FunctionAppKey} )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['result'], False)
+        self.assertEqual(response.json()['msg'], "2 prompts created")
+
+        results = response.json()['results']
+        self.assertEqual(results[0]['result'], True)
+        self.assertEqual(results[1]['msg'], "Prompt less than 20 characters or more than 100 characters")
+        self.assertEqual(results[2]['msg'], "Unsupported language")
+        self.assertEqual(results[3]['result'], True)
+
+        docs = list(self.PromptContainerProxy.read_all_items())
+        self.assertEqual(len(docs), 2)
+        for doc in docs:
+            self.assertEqual(doc['username'], self.prompts['username'])
+            self.assertEqual(len(doc['texts']), 6)
+
+    def testPlayerDoesNotExist(self):
+        '''
+        Test prompts for a player that does not exist
+        '''
+        response = requests.post(self.TEST_URL, json={"username": "notplayer", "texts": self.prompts['texts']},
+                                 headers={"x-functions-key": self.FunctionAppKey} )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['result'], False)
+        self.assertEqual(response.json()['msg'], "Player does not exist")
+
+    if __name__ == '__main__':
+        unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+import sys
+import time
+
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from shared_code.ExistenceCache import ExistenceCache
+
+class TestExistenceCache(unittest.TestCase):
+
+    def testKnownPlayer(self):
+        '''
+        Test a remembered player is found with its location
+        '''
+        cache = ExistenceCache()
+        cache.add("bryanvullo", "1234", "1234")
+
+        self.assertEqual(cache.get("bryanvullo"), ("1234", "1234"))
+        self.assertIsNone(cache.get("notplayer"))
+        self.assertEqual(cache.stats()['hits'], 1)
+        self.assertEqual(cache.stats()['misses'], 1)
+
+    def testBoundedAndExpired(self):
+        '''
+        Test the least recently used player is dropped and entries expire
+        '''
+        cache = ExistenceCache(maxSize=2, ttl=0.01)
+        cache.add("alpha-user", "1", "1")
+        cache.add("bravo-user", "2", "2")
+        cache.get("alpha-user")
+        cache.add("charlie-user", "3", "3")
+
+        self.assertIsNone(cache.get("bravo-user"))
+        self.assertEqual(cache.stats()['size'], 2)
+
+        time.sleep(0.02)
+        self.assertIsNone(cache.get("alpha-user"))
+
+    if __name__ == '__main__':
+        unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+import sys
+
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from shared_code import Fakes, Podium
+from shared_code.PlayerStore import KEYED_MODE, PlayerStore
+
+class TestFakes(unittest.IsolatedAsyncioTestCase):
+    prompt = {"id": "p1", "username": "bryanvullo", "texts": [
+        {"language": "en", "text": "What is the best food?"},
+        {"language": "es", "text": "¿Cuál es la mejor comida?"}]}
+
+    async def testQueries(self):
+        '''
+        Test the fake answers the queries the app makes like Cosmos
+        '''
+        container = Fakes.FakeContainer("prompt", "/username")
+        await container.create_item(body=self.prompt)
+        await container.create_item(body={"username": "other-user", "texts": []}, enable_automatic_id_generation=True)
+
+        rows = [row async for row in container.query_items(
+            query='SELECT prompt.id, ARRAY(SELECT VALUE t.text FROM t IN prompt.texts WHERE t.language = @language) AS texts '
+                'FROM prompt WHERE prompt.username = @username '
+                'AND ARRAY_CONTAINS(prompt.texts, {"language": @language}, true)',
+            parameters=[dict(name='@username', value="bryanvullo"), dict(name='@language', value="es")],
+            partition_key="bryanvullo")]
+        self.assertEqual(rows, [{"id": "p1", "texts": ["¿Cuál es la mejor comida?"]}])
+
+        ids = [id async for id in container.query_items(
+            query='SELECT VALUE prompt.id FROM prompt WHERE ARRAY_CONTAINS(@ids, prompt.id)',
+            parameters=[dict(name='@ids', value=["p1", "p2"])])]
+        self.assertEqual(ids, ["p1"])
+
+    async def testPagesAndPatch(self):
+        '''
+        Test paging with continuation tokens and patch increments
+        '''
+        container = Fakes.FakeContainer("player", "/id")
+        for i in range(5):
+            await container.create_item(body={"id": f"u{i}", "username": f"u{i}", "games_played": 0, "total_score": 0})
+        await container.patch_item(item="u3", partition_key="u3",
+                                   patch_operations=[{"op": "incr", "path": "/total_score", "value": 7}])
+
+        pages = container.query_items(query=Podium.PlayerStatsQuery, max_item_count=2).by_page()
+        sizes = [len([row async for row in page]) async for page in pages]
+        self.assertEqual(sizes, [2, 2, 1])
+        self.assertEqual((await container.read_item(item="u3", partition_key="u3"))['total_score'], 7)
+
+    async def testBatchIsTransactional(self):
+        '''
+        Test a failed batch operation leaves the container unchanged
+        '''
+        container = Fakes.FakeContainer("prompt", "/username")
+        await container.create_item(body=self.prompt)
+
+        with self.assertRaises(Fakes.CosmosBatchOperationError):
+            await container.execute_item_batch(batch_operations=[("delete", ("p1",)), ("delete", ("p2",))],
+                                               partition_key="bryanvullo")
+        self.assertEqual(len(container.docs), 1)
+
+    async def testKeyedPlayerIdsEscaped(self):
+        '''
+        Test keyed players whose username has characters Cosmos does not allow in ids are stored and found
+        '''
+        players = PlayerStore(Fakes.FakeContainer("player", "/id"), KEYED_MODE)
+        for username in ["bob/smith", "bob%2Fsmith", "what?#\\"]:
+            self.assertTrue(await players.create({"username": username, "password": "password123",
+                                                  "games_played": 0, "total_score": 0}))
+        self.assertFalse(await players.create({"username": "bob/smith", "password": "password123",
+                                               "games_played": 0, "total_score": 0}))
+
+        self.assertTrue(await players.increment("bob/smith", 1, 50))
+        self.assertEqual((await players.get("bob/smith"))['total_score'], 50)
+        self.assertEqual((await players.get("bob%2Fsmith"))['total_score'], 0)
+        self.assertEqual((await players.get("what?#\\"))['username'], "what?#\\")
+        for username in [None, 42, ["bob/smith"]]:
+            self.assertIsNone(await players.get(username))
+            self.assertFalse(await players.exists(username))
+
+    if __name__ == '__main__':
+        unittest.main()
@@ -1,6 +1,7 @@
 import unittest
 import requests
 import json
+import base64
 from azure.cosmos.exceptions import CosmosHttpResponseError, CosmosResourceExistsError, CosmosResourceNotFoundError
 from azure.cosmos import CosmosClient
 
@@ -149,7 +150,71 @@ class TestGetUtils(unittest.TestCase):
         self.assertEqual(testPromptsSet, responsePromptsSet)
         self.assertEqual(testUsernamesSet, responseUsernamesSet)
 
-        
+
+    def testGetPromptsAsNdjson(self):
+        '''
+        Test getting prompts as newline delimited JSON
+        '''
+        body = {
+            "players" : ["bryanvullo", "bryanvullo3"],
+            "language" : "en",
+            "format" : "ndjson"
+        }
+        response = requests.get(self.TEST_URL, json=(body),
+                                headers={"x-functions-key": self.FunctionAppKey})
+
+        self.assertEqual(response.status_code, 200)
+        prompts = [json.loads(line) for line in response.text.splitlines()]
+        self.assertEqual(len(prompts), 3)
+        self.assertEqual(prompts[-1].get('username'), "bryanvullo3")
+
+    def testGetPromptsInPages(self):
+        '''
+        Test following continuations returns every prompt once, in the order of players
+        '''
+        body = {
+            "players" : ["bryanvullo", "bryanvullo2", "bryanvullo3"],
+            "language" : "en",
+            "pageSize" : 2
+        }
+        prompts = []
+        for page in range(10):
+            response = requests.get(self.TEST_URL, json=(body),
+                                    headers={"x-functions-key": self.FunctionAppKey})
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.json()['prompts']), 2)
+            prompts.extend(response.json()['prompts'])
+            if response.json()['continuation'] is None:
+                break
+            body['continuation'] = response.json()['continuation']
+
+        self.assertEqual(len(prompts), 5)
+        self.assertEqual(len({prompt.get('id') for prompt in prompts}), 5)
+        self.assertEqual([prompt.get('username') for prompt in prompts],
+                         ["bryanvullo", "bryanvullo", "bryanvullo2", "bryanvullo2", "bryanvullo3"])
+
+    def testInvalidContinuation(self):
+        '''
+        Test an invalid continuation is rejected
+        '''
+        body = {
+            "players" : ["bryanvullo"],
+            "language" : "en",
+            "continuation" : "not a continuation"
+        }
+        response = requests.get(self.TEST_URL, json=(body),
+                                headers={"x-functions-key": self.FunctionAppKey})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['msg'], "Invalid continuation")
+
+        # well formed, but Cosmos never issued the token
+        body['continuation'] = base64.urlsafe_b64encode(json.dumps([0, "not a cosmos token"]).encode()).decode()
+        response = requests.get(self.TEST_URL, json=(body),
+                                headers={"x-functions-key": self.FunctionAppKey})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['msg'], "Invalid continuation")
 
     if __name__ == '__main__':
         unittest.main()
@@ -0,0 +1,111 @@
+import unittest
+import random
+import sys
+
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from shared_code import Fakes, Podium, Leaderboard as LeaderboardModule
+from shared_code.Leaderboard import Leaderboard, LeaderboardStore
+
+class TestLeaderboard(unittest.TestCase):
+
+    def testMatchesFullScanUnderUpdates(self):
+        '''
+        Test the maintained board always returns the full scan podium, including ties
+        '''
+        rng = random.Random(2425)
+        players = {}
+        for i in range(300):
+            players[f"user{i:04d}"] = {"username": f"user{i:04d}", "games_played": 0, "total_score": 0}
+
+        board = Leaderboard.fromPlayers(players.values(), depth=5)
+        board.trim(5, 20)
+        rebuilds = 0
+        for _ in range(3000):
+            player = players[rng.choice(list(players))]
+            player['games_played'] += rng.randint(0, 2)
+            player['total_score'] += rng.randint(0, 6)
+            if not board.apply(player):
+                board = Leaderboard.fromPlayers(players.values(), depth=5)
+                rebuilds += 1
+            board.trim(5, 20)
+
+            expected = Podium.podium(Podium.topTiers(players.values()))
+            self.assertEqual(board.podium(), expected)
+
+        self.assertTrue(rebuilds < 3000)
+
+    def testDocumentRoundTrip(self):
+        '''
+        Test the board survives being stored as a document
+        '''
+        players = [{"username": "alpha-user", "games_played": 10, "total_score": 40},
+                   {"username": "delta-user", "games_played": 10, "total_score": 80}]
+        board = Leaderboard.fromPlayers(players, depth=10)
+        stored = Leaderboard.fromDocument(board.toDocument())
+
+        self.assertEqual(stored.players, board.players)
+        self.assertEqual(stored.floor, None)
+        self.assertEqual(stored.podium(), Podium.podium(Podium.topTiers(players)))
+
+class TestLeaderboardStore(unittest.IsolatedAsyncioTestCase):
+    players = [{"id": name, "username": name, "games_played": 1, "total_score": score}
+               for name, score in [("alpha-user", 10), ("bravo-user", 20), ("delta-user", 30)]]
+
+    async def asyncSetUp(self):
+        playerContainer = Fakes.FakeContainer("player", "/id")
+        for player in self.players:
+            await playerContainer.create_item(body=player)
+        self.container = Fakes.FakeContainer("leaderboard", "/id")
+        self.store = LeaderboardStore(self.container, playerContainer)
+
+        # a newer board is stored while the bootstrap scan runs, e.g. by the change feed trigger
+        self.newer = Leaderboard.fromPlayers(self.players + [{"username": "echo-user", "games_played": 1, "total_score": 90}], 10)
+        scan = self.store.scan
+        async def slowScan():
+            board = await scan()
+            await self.container.create_item(body=self.newer.toDocument())
+            return board
+        self.store.scan = slowScan
+
+    async def testReadKeepsNewerBoard(self):
+        '''
+        Test a bootstrap scan does not overwrite a board stored meanwhile
+        '''
+        board = await self.store.read()
+        self.assertEqual(board.players, self.newer.players)
+        stored = await self.container.read_item(item="podium", partition_key="podium")
+        self.assertIn("echo-user", Leaderboard.fromDocument(stored).players)
+
+    async def testBoardTooLargeIsNotStored(self):
+        '''
+        Test a board too large to store is removed and podiums are scanned instead of failing forever
+        '''
+        store = LeaderboardStore(self.container, self.store.playerContainer)
+        await store.read()
+        maxBytes = LeaderboardModule.MaxDocumentBytes
+        LeaderboardModule.MaxDocumentBytes = 200
+        try:
+            await store.apply([{"username": f"new-user{i}", "games_played": 0, "total_score": 0} for i in range(5)])
+            self.assertEqual(len(self.container.docs), 0)
+            for player in self.players:
+                player = dict(player, id=player['username'] + "-twin", username=player['username'] + "-twin")
+                await store.playerContainer.create_item(body=player)
+            board = await store.read()
+            self.assertEqual(len(self.container.docs), 0)
+            self.assertEqual(len(board.podium()['gold']), 2)
+        finally:
+            LeaderboardModule.MaxDocumentBytes = maxBytes
+
+    async def testApplyKeepsNewerBoard(self):
+        '''
+        Test changes are applied to a board stored during the bootstrap scan
+        '''
+        await self.store.apply([{"username": "alpha-user", "games_played": 2, "total_score": 100}])
+        stored = Leaderboard.fromDocument(await self.container.read_item(item="podium", partition_key="podium"))
+        self.assertIn("echo-user", stored.players)
+        self.assertEqual(stored.players["alpha-user"], (2, 100))
+
+    if __name__ == '__main__':
+        unittest.main()
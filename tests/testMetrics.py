@@ -0,0 +1,91 @@
+import unittest
+import sys
+
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from shared_code import Metrics
+
+class Page:
+    def __init__(self, items):
+        self.items = items
+
+    async def __aiter__(self):
+        for item in self.items:
+            yield item
+
+class Query:
+    '''
+    two pages of query results, calling the response hook once per page like azure.cosmos.aio
+    which also calls it on creation with the client's last response headers, from an unrelated request
+    '''
+    def __init__(self, hook):
+        self.hook = hook
+        hook({"x-ms-request-charge": "40", "x-ms-throttle-retry-count": "3"}, {})
+
+    async def __aiter__(self):
+        for page in [[1, 2], [3]]:
+            self.hook({"x-ms-request-charge": "2.5"}, page)
+            for item in page:
+                yield item
+
+class Container:
+    id = "players"
+
+    async def read_item(self, item, partition_key, response_hook):
+        response_hook({"x-ms-request-charge": "1", "x-ms-throttle-retry-count": "2"}, {})
+        return {"id": item}
+
+    async def delete_item(self, item, partition_key, response_hook):
+        raise KeyError(item)
+
+    def query_items(self, query, response_hook):
+        return Query(response_hook)
+
+class TestMetrics(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        Metrics.reset()
+        Metrics.LogCalls = False
+
+    def testPercentiles(self):
+        '''
+        Test percentiles are bucket upper bounds, capped at the slowest call
+        '''
+        histogram = Metrics.Histogram()
+        for ms in [0.5] * 90 + [15] * 9 + [120]:
+            histogram.add(ms)
+
+        self.assertEqual(histogram.percentile(0.5), 1)
+        self.assertEqual(histogram.percentile(0.95), 20)
+        self.assertEqual(histogram.percentile(0.99), 20)
+        self.assertEqual(histogram.percentile(1.0), 120)
+        self.assertIsNone(Metrics.Histogram().percentile(0.5))
+
+    async def testCallsRecordedPerRoute(self):
+        '''
+        Test request charge, retries, errors and pages are recorded under the handler's route
+        '''
+        container = Metrics.Instrumented(Container())
+
+        @Metrics.routed("player/login")
+        async def handler():
+            await container.read_item(item="alpha-user", partition_key="alpha-user")
+            with self.assertRaises(KeyError):
+                await container.delete_item(item="alpha-user", partition_key="alpha-user")
+            return [item async for item in container.query_items(query="SELECT * FROM player")]
+
+        self.assertEqual(await handler(), [1, 2, 3])
+
+        calls = Metrics.report()["player/login"]
+        self.assertEqual(calls["cosmos/players read_item"]["charge"], 1)
+        self.assertEqual(calls["cosmos/players read_item"]["retries"], 2)
+        self.assertEqual(calls["cosmos/players delete_item"]["errors"], 1)
+        self.assertEqual(calls["cosmos/players query_items"]["calls"], 2)
+        self.assertEqual(calls["cosmos/players query_items"]["charge"], 5)
+        self.assertEqual(calls["cosmos/players query_items"]["retries"], 0)
+        self.assertEqual(calls["function player/login"]["calls"], 1)
+        self.assertEqual(Metrics.Route.get(), "background")
+
+    if __name__ == '__main__':
+        unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+import asyncio
+import sys
+
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from shared_code import Fakes, Metrics
+from shared_code.ExistenceCache import ExistenceCache
+from shared_code.PlayerStore import PlayerStore, QUERY_MODE, KEYED_MODE, PATCH_UPDATE, ETAG_UPDATE
+
+class TestPlayerStore(unittest.IsolatedAsyncioTestCase):
+    player = {"username": "bryanvullo", "password": "password123", "games_played": 0, "total_score": 0}
+
+    def setUp(self):
+        Metrics.reset()
+        Metrics.LogCalls = False
+
+    async def concurrentIncrements(self, mode, updateMode):
+        '''
+        applies 50 concurrent increments to one player, returns the stored player
+        '''
+        # latency interleaves the reads and writes of concurrent updates
+        players = PlayerStore(Fakes.FakeContainer("player", "/id", latency=0.001), mode, updateMode)
+        await players.create(dict(self.player))
+
+        results = await asyncio.gather(*[players.increment("bryanvullo", 1, 10) for _ in range(50)])
+        self.assertTrue(all(results))
+        return await players.get("bryanvullo")
+
+    async def testConcurrentPatchIncrements(self):
+        '''
+        Test no concurrent patch increment is lost, in both storage modes
+        '''
+        for mode in [QUERY_MODE, KEYED_MODE]:
+            player = await self.concurrentIncrements(mode, PATCH_UPDATE)
+            self.assertEqual((player['games_played'], player['total_score']), (50, 500))
+
+    async def testConcurrentEtagIncrements(self):
+        '''
+        Test concurrent ETag increments retry on conflict instead of overwriting each other
+        '''
+        for mode in [QUERY_MODE, KEYED_MODE]:
+            Metrics.reset()
+            players = PlayerStore(Fakes.FakeContainer("player", "/id", latency=0.001), mode, ETAG_UPDATE, retries=100)
+            await players.create(dict(self.player))
+
+            results = await asyncio.gather(*[players.increment("bryanvullo", 1, 10) for _ in range(20)])
+            self.assertTrue(all(results))
+            player = await players.get("bryanvullo")
+            self.assertEqual((player['games_played'], player['total_score']), (20, 200))
+            retries = sum(stats['retries'] for calls in Metrics.report().values() for stats in calls.values())
+            self.assertGreater(retries, 0)
+
+    async def testStaleCachedLocation(self):
+        '''
+        Test an increment finds the player again when its cached location no longer exists
+        '''
+        container = Fakes.FakeContainer("player", "/id")
+        known = ExistenceCache()
+        players = PlayerStore(container, QUERY_MODE, PATCH_UPDATE, known=known)
+        await players.create(dict(self.player))
+        old = await players.get("bryanvullo")
+
+        # the document is rewritten under a new id, e.g. by hand
+        await container.delete_item(item=old['id'], partition_key=old['id'])
+        await container.create_item(body=dict(self.player, id="new-id"))
+        self.assertEqual(known.get("bryanvullo"), (old['id'], old['id']))
+
+        self.assertTrue(await players.increment("bryanvullo", 1, 10))
+        self.assertEqual((await players.get("bryanvullo"))['total_score'], 10)
+        self.assertEqual(known.get("bryanvullo"), ("new-id", "new-id"))
+
+    if __name__ == '__main__':
+        unittest.main()
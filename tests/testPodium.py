@@ -0,0 +1,87 @@
+import unittest
+import random
+import sys
+
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from shared_code import Podium
+from shared_code.Player import Player
+
+def sortedPodium(players):
+    '''
+    Reference podium: sort every player, then take the first 3 ppgr tiers
+    '''
+    stats = [Player.from_dict(p) for p in players]
+    stats.sort(key=lambda p: (-p.ppgr(), p.games_played, p.username))
+    tiers = []
+    for s in stats:
+        if tiers and tiers[-1][0].ppgr() == s.ppgr():
+            tiers[-1].append(s)
+        elif len(tiers) < 3:
+            tiers.append([s])
+        else:
+            break
+    return Podium.podium(tiers)
+
+class TestPodium(unittest.TestCase):
+
+    players = [
+        {"username": "alpha-user", "games_played": 10, "total_score": 40},
+        {"username": "bravo-user", "games_played": 20, "total_score": 80},
+        {"username": "charlie-user", "games_played": 10, "total_score": 40},
+        {"username": "delta-user", "games_played": 10, "total_score": 80},
+        {"username": "echo-user", "games_played": 50, "total_score": 100},
+        {"username": "foxtrot-user", "games_played": 10, "total_score": 10},
+        {"username": "golf-user", "games_played": 10, "total_score": 10}
+    ]
+
+    def testPodium(self):
+        '''
+        Test the tiers and tie break order
+        '''
+        result = Podium.podium(Podium.topTiers(self.players))
+
+        self.assertEqual([p['username'] for p in result['gold']], ['delta-user'])
+        self.assertEqual([p['username'] for p in result['silver']],
+                         ['alpha-user', 'charlie-user', 'bravo-user'])
+        self.assertEqual([p['username'] for p in result['bronze']], ['echo-user'])
+
+    def testFewerThanThreeTiers(self):
+        '''
+        Test missing tiers are empty lists
+        '''
+        result = Podium.podium(Podium.topTiers(self.players[:1]))
+
+        self.assertEqual(len(result['gold']), 1)
+        self.assertEqual(result['silver'], [])
+        self.assertEqual(result['bronze'], [])
+
+        self.assertEqual(Podium.podium(Podium.topTiers([])), {"gold": [], "silver": [], "bronze": []})
+
+    def testNoGamesPlayed(self):
+        '''
+        Test players with no games have ppgr 0
+        '''
+        players = [{"username": "new-user", "games_played": 0, "total_score": 0},
+                   {"username": "old-user", "games_played": 2, "total_score": 0}]
+        result = Podium.podium(Podium.topTiers(players))
+
+        self.assertEqual([p['username'] for p in result['gold']], ['new-user', 'old-user'])
+
+    def testMatchesFullSort(self):
+        '''
+        Test against sorting every player, with many ties
+        '''
+        rng = random.Random(3207)
+        players = []
+        for i in range(2000):
+            games = rng.randint(0, 6)
+            players.append({"username": f"user{i:05d}", "games_played": games,
+                            "total_score": games * rng.randint(0, 4)})
+        rng.shuffle(players)
+
+        self.assertEqual(Podium.podium(Podium.topTiers(players)), sortedPodium(players))
+
+    if __name__ == '__main__':
+        unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+import sys
+
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from shared_code import PromptIndex
+
+class Results:
+    '''
+    async iterable of query results, like azure.cosmos.aio query_items
+    '''
+    def __init__(self, items):
+        self.items = items
+
+    async def __aiter__(self):
+        for item in self.items:
+            yield item
+
+class Container:
+    '''
+    just enough of an azure.cosmos.aio container (partitioned by /username) for PromptIndex
+    '''
+    def __init__(self, docs=()):
+        self.docs = {(doc['username'], doc['id']): doc for doc in docs}
+
+    def query_items(self, query, parameters, partition_key):
+        values = {p['name']: p['value'] for p in parameters}
+        docs = [doc for (username, id), doc in self.docs.items() if username == partition_key]
+        if 'entry.promptId AS id' in query:
+            return Results([{"id": d['promptId'], "text": d['text']} for d in docs if d['language'] == values['@language']])
+        if 'entry.promptId)' in query:
+            return Results([d['id'] for d in docs if d['promptId'] in values['@ids']])
+        return Results([d['id'] for d in docs if d['id'] in values['@ids']])
+
+    async def execute_item_batch(self, batch_operations, partition_key):
+        for operation, args in batch_operations:
+            if operation == "upsert":
+                self.docs[(partition_key, args[0]['id'])] = args[0]
+            else:
+                del self.docs[(partition_key, args[0])]
+
+class TestPromptIndex(unittest.IsolatedAsyncioTestCase):
+    prompt = {"id": "p1", "username": "bryanvullo", "texts": [
+        {"language": "en", "text": "What is the best food?"},
+        {"language": "es", "text": "¿Cuál es la mejor comida?"},
+        {"language": "en", "text": "What is the greatest food?"}]}
+
+    def testEntries(self):
+        '''
+        Test one entry per language, with the first text in that language
+        '''
+        entries = PromptIndex.entries(self.prompt)
+
+        self.assertEqual([e['id'] for e in entries], ["p1:en", "p1:es"])
+        self.assertEqual(entries[0]['text'], "What is the best food?")
+        self.assertEqual({e['username'] for e in entries}, {"bryanvullo"})
+
+    async def testApplyAndQuery(self):
+        '''
+        Test indexed prompts are read by language
+        '''
+        index = PromptIndex.PromptIndex(Container(), Container([self.prompt]))
+        await index.apply([self.prompt])
+
+        rows = [row async for row in index.query("bryanvullo", "es")]
+        self.assertEqual(rows, [{"id": "p1", "text": "¿Cuál es la mejor comida?"}])
+        self.assertEqual([row async for row in index.query("bryanvullo", "pl")], [])
+
+    async def testDeletedPromptNotIndexed(self):
+        '''
+        Test a prompt deleted before its change is applied is removed from the index again
+        '''
+        container = Container()
+        index = PromptIndex.PromptIndex(container, Container())
+        await index.apply([self.prompt])
+
+        self.assertEqual(container.docs, {})
+
+    async def testDelete(self):
+        '''
+        Test deleting a player's prompts removes only their entries
+        '''
+        other = {"id": "p2", "username": "bryanvullo", "texts": [{"language": "en", "text": "What is the best drink?"}]}
+        container = Container()
+        index = PromptIndex.PromptIndex(container, Container([self.prompt, other]))
+        await index.apply([self.prompt, other])
+
+        self.assertEqual(await index.delete("bryanvullo", ["p1"]), 2)
+        self.assertEqual([id for username, id in container.docs], ["p2:en"])
+
+    if __name__ == '__main__':
+        unittest.main()
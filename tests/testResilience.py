@@ -0,0 +1,167 @@
+import unittest
+import asyncio
+import sys
+import time
+
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from shared_code import Resilience
+
+class ServiceError(Exception):
+    '''
+    error with a status and headers, like CosmosHttpResponseError
+    '''
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+        self.headers = headers or {}
+
+class Flaky:
+    '''
+    fails with errors, in order, then answers "ok"
+    '''
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+class TestResilience(unittest.IsolatedAsyncioTestCase):
+
+    async def testRetryAfterHonoured(self):
+        '''
+        Test throttled calls wait the time the service asks for, then succeed
+        '''
+        operation = Flaky(ServiceError(429, {"x-ms-retry-after-ms": "50"}), ServiceError(503, {"Retry-After": "0"}))
+        policy = Resilience.RetryPolicy("cosmos", attempts=3, baseSeconds=10)
+
+        start = time.monotonic()
+        self.assertEqual(await policy.call(operation, "read_item"), "ok")
+        self.assertEqual(operation.calls, 3)
+        self.assertGreaterEqual(time.monotonic() - start, 0.05)
+        self.assertLess(time.monotonic() - start, 1)
+
+    async def testNotTransientRaised(self):
+        '''
+        Test errors that are not transient are raised without retrying
+        '''
+        operation = Flaky(ServiceError(404))
+        with self.assertRaises(ServiceError):
+            await Resilience.RetryPolicy("cosmos").call(operation, "read_item")
+        self.assertEqual(operation.calls, 1)
+
+    async def testRetriesExhausted(self):
+        '''
+        Test running out of attempts is reported as unavailable
+        '''
+        operation = Flaky(*[ServiceError(503)] * 5)
+        policy = Resilience.RetryPolicy("translator", attempts=3, baseSeconds=0.001)
+        with self.assertRaises(Resilience.Unavailable):
+            await policy.call(operation, "translate")
+        self.assertEqual(operation.calls, 3)
+
+    async def testDeadline(self):
+        '''
+        Test a slow call and a long retry-after both give up at the request deadline
+        '''
+        async def slow():
+            await asyncio.sleep(5)
+
+        policy = Resilience.RetryPolicy("openai", attempts=1)
+        with Resilience.deadline(0.05):
+            with self.assertRaises(Resilience.Unavailable):
+                await policy.call(slow, "chat.completions.create")
+
+        operation = Flaky(ServiceError(429, {"Retry-After": "30"}))
+        with Resilience.deadline(1):
+            with self.assertRaises(Resilience.Unavailable) as raised:
+                await Resilience.RetryPolicy("translator").call(operation, "translate")
+        self.assertEqual(operation.calls, 1)
+        self.assertEqual(raised.exception.retryAfter, 30)
+
+    async def testCircuitBreaker(self):
+        '''
+        Test the circuit opens after repeated failures, fails fast, then closes after a successful trial
+        '''
+        breaker = Resilience.CircuitBreaker("translator", failureThreshold=2, resetSeconds=0.05)
+        policy = Resilience.RetryPolicy("translator", attempts=1)
+        for _ in range(2):
+            with self.assertRaises(Resilience.Unavailable):
+                await policy.call(Flaky(ServiceError(500)), "translate", breaker)
+
+        operation = Flaky()
+        with self.assertRaises(Resilience.Unavailable):
+            await policy.call(operation, "translate", breaker)
+        self.assertEqual(operation.calls, 0)
+        self.assertEqual(breaker.stats()['state'], "open")
+
+        await asyncio.sleep(0.06)
+        self.assertEqual(await policy.call(operation, "translate", breaker), "ok")
+        self.assertEqual(breaker.stats()['state'], "closed")
+
+    async def testWritesOnlyRetriedWhenThrottled(self):
+        '''
+        Test a container write is not repeated after a 503, which may have been applied, while reads are
+        '''
+        class Container:
+            def __init__(self):
+                self.read_item = Flaky(ServiceError(503))
+                self.patch_item = Flaky(ServiceError(503))
+                self.create_item = Flaky(ServiceError(429, {"x-ms-retry-after-ms": "1"}))
+
+        container = Container()
+        resilient = Resilience.Resilient(
+            container,
+            Resilience.RetryPolicy("cosmos", baseSeconds=0.001),
+            writePolicy=Resilience.RetryPolicy("cosmos", baseSeconds=0.001, retryableStatus={429, 449}, transient=())
+        )
+        self.assertEqual(await resilient.read_item(), "ok")
+        self.assertEqual(container.read_item.calls, 2)
+        with self.assertRaises(ServiceError):
+            await resilient.patch_item()
+        self.assertEqual(container.patch_item.calls, 1)
+        self.assertEqual(await resilient.create_item(), "ok")
+        self.assertEqual(container.create_item.calls, 2)
+
+    async def testWriteAtDeadlineUnavailable(self):
+        '''
+        Test a write still running at the request deadline is reported as unavailable, without retrying it
+        '''
+        calls = []
+        async def write():
+            calls.append(1)
+            await asyncio.sleep(5)
+
+        policy = Resilience.RetryPolicy("cosmos", retryableStatus={429, 449}, transient=())
+        with Resilience.deadline(0.05):
+            with self.assertRaises(Resilience.Unavailable):
+                await policy.call(write, "patch_item")
+        self.assertEqual(len(calls), 1)
+
+    async def testQueryAtDeadlineUnavailable(self):
+        '''
+        Test iterating a slow query gives up at the request deadline
+        '''
+        class Container:
+            def query_items(self, query):
+                async def results():
+                    yield 1
+                    await asyncio.sleep(5)
+                    yield 2
+                return results()
+
+        container = Resilience.Resilient(Container(), Resilience.RetryPolicy("cosmos"))
+        results = []
+        with Resilience.deadline(0.05):
+            with self.assertRaises(Resilience.Unavailable):
+                async for item in container.query_items(query="SELECT * FROM c"):
+                    results.append(item)
+        self.assertEqual(results, [1])
+
+    if __name__ == '__main__':
+        unittest.main()
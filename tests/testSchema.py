@@ -0,0 +1,54 @@
+import unittest
+import sys
+
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from shared_code import FastJson
+from shared_code.Player import Player
+from shared_code.Prompt import Prompt
+
+class TestSchema(unittest.TestCase):
+
+    def testValidPlayer(self):
+        '''
+        Test a new player matches player.json and round trips through JSON
+        '''
+        player = Player(None, "bryanvullo", "password123", 0, 0)
+
+        self.assertEqual(player.validate(), [])
+        self.assertNotIn("id", player.to_dict())
+        self.assertEqual(FastJson.loads(player.to_json()), player.to_dict())
+        self.assertEqual(Player.from_dict(FastJson.loads(player.to_json())).to_dict(), player.to_dict())
+
+    def testInvalidPlayer(self):
+        '''
+        Test invalid and missing player fields are reported
+        '''
+        self.assertEqual(Player(None, "abc", "password123", 0, 0).validate(), ["username"])
+        self.assertEqual(Player(None, "bryanvullo", "pass", 0, 0).validate(), ["password"])
+        self.assertEqual(Player(None, None, None, -1, True).validate(),
+                         ["username", "password", "games_played", "total_score"])
+
+    def testPromptText(self):
+        '''
+        Test prompt text length limits from prompt.json
+        '''
+        self.assertTrue(Prompt.is_valid_text("x" * 20))
+        self.assertTrue(Prompt.is_valid_text("x" * 100))
+        self.assertFalse(Prompt.is_valid_text("x" * 19))
+        self.assertFalse(Prompt.is_valid_text("x" * 101))
+        self.assertFalse(Prompt.is_valid_text(None))
+
+    def testPrompt(self):
+        '''
+        Test prompt documents leave the id to Cosmos unless one is given
+        '''
+        texts = [{"language": "en", "text": "What is the best food?"},
+                 {"language": "es", "text": "¿Cuál es la mejor comida?"}]
+
+        self.assertEqual(Prompt(None, "bryanvullo", texts).to_dict(), {"username": "bryanvullo", "texts": texts})
+        self.assertEqual(Prompt("p1", "bryanvullo", texts).to_dict()['id'], "p1")
+
+    if __name__ == '__main__':
+        unittest.main()
@@ -0,0 +1,105 @@
+import unittest
+import asyncio
+import sys
+
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from shared_code.SingleFlight import SingleFlight
+
+class Scan:
+    '''
+    slow computation counting its calls, failing while fail is set
+    '''
+    def __init__(self):
+        self.calls = 0
+        self.fail = False
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(0.02)
+        if self.fail:
+            raise RuntimeError("scan failed")
+        return self.calls
+
+class TestSingleFlight(unittest.IsolatedAsyncioTestCase):
+
+    async def testConcurrentCallsShareOneComputation(self):
+        '''
+        Test concurrent callers get the result of a single computation
+        '''
+        scan = Scan()
+        podium = SingleFlight(scan)
+
+        self.assertEqual(await asyncio.gather(*[podium.get() for _ in range(50)]), [1] * 50)
+        self.assertEqual(scan.calls, 1)
+        self.assertEqual(podium.stats()['coalesced'], 49)
+
+        # without a ttl the next burst computes again
+        self.assertEqual(await podium.get(), 2)
+
+    async def testResultKeptForTtl(self):
+        '''
+        Test the result is reused within the ttl and recomputed after invalidate
+        '''
+        scan = Scan()
+        podium = SingleFlight(scan, ttl=60)
+
+        await podium.get()
+        self.assertEqual(await podium.get(), 1)
+        self.assertEqual(podium.stats()['hits'], 1)
+
+        podium.invalidate()
+        self.assertEqual(await podium.get(), 2)
+
+    async def testInvalidateDuringComputation(self):
+        '''
+        Test a computation that read the state before invalidate is neither cached nor shared with later callers
+        '''
+        state = {"podium": "old"}
+
+        async def scan():
+            podium = state['podium']
+            await asyncio.sleep(0.02)
+            return podium
+
+        podium = SingleFlight(scan, ttl=60)
+        stale = asyncio.ensure_future(podium.get())
+        await asyncio.sleep(0.005)
+        state['podium'] = "new"
+        podium.invalidate()
+
+        self.assertEqual(await podium.get(), "new")
+        self.assertEqual(await stale, "old")
+        self.assertEqual(await podium.get(), "new")
+
+    async def testErrorsShared(self):
+        '''
+        Test a failed computation reaches every waiter and is not kept
+        '''
+        scan = Scan()
+        scan.fail = True
+        podium = SingleFlight(scan, ttl=60)
+
+        results = await asyncio.gather(podium.get(), podium.get(), return_exceptions=True)
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results))
+
+        scan.fail = False
+        self.assertEqual(await podium.get(), 2)
+
+    async def testCancelledCallerDoesNotCancelOthers(self):
+        '''
+        Test a caller giving up does not cancel the shared computation
+        '''
+        scan = Scan()
+        podium = SingleFlight(scan)
+
+        first = asyncio.ensure_future(podium.get())
+        second = asyncio.ensure_future(podium.get())
+        await asyncio.sleep(0.005)
+        first.cancel()
+
+        self.assertEqual(await second, 1)
+
+    if __name__ == '__main__':
+        unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+import asyncio
+import sys
+
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from shared_code.SuggestionPool import SuggestionPool
+
+def isValidSuggestion(suggestion, keyword):
+    return len(suggestion) >= 20 and len(suggestion) <= 100 and keyword in suggestion
+
+class TestSuggestionPool(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        '''
+        Pool with a counting stand in for the model
+        '''
+        self.calls = 0
+        async def generate(keyword):
+            self.calls += 1
+            return [f"What is your favourite {keyword} number {self.calls}.{i}?" for i in range(3)] + ["short"]
+        self.pool = SuggestionPool(generate, isValidSuggestion, minSize=2, maxSize=5)
+
+    async def refilled(self):
+        await asyncio.gather(*self.pool.refilling.values())
+
+    async def testServedFromPool(self):
+        '''
+        Test only the first request for a keyword waits for the model
+        '''
+        first = await self.pool.take("food")
+        await self.refilled()
+        second = await self.pool.take("food")
+
+        self.assertTrue(isValidSuggestion(first, "food"))
+        self.assertTrue(isValidSuggestion(second, "food"))
+        self.assertNotEqual(first, second)
+        self.assertEqual(self.pool.stats()['misses'], 1)
+        self.assertEqual(self.pool.stats()['hits'], 1)
+
+    async def testKeywordMustBeContained(self):
+        '''
+        Test pooled suggestions are rechecked against the requested keyword
+        '''
+        await self.pool.take("food")
+        await self.refilled()
+
+        suggestion = await self.pool.take(" FOOD ")
+
+        self.assertIn(" FOOD ", suggestion)
+        self.assertEqual(self.pool.stats()['misses'], 2)
+
+    async def testNoValidSuggestion(self):
+        '''
+        Test None when the model returns no valid suggestion
+        '''
+        async def generate(keyword):
+            return ["short", None]
+        pool = SuggestionPool(generate, isValidSuggestion)
+
+        self.assertIsNone(await pool.take("food"))
+        await asyncio.gather(*pool.refilling.values())
+
+    if __name__ == '__main__':
+        unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+import asyncio
+import sys
+
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from azure.cosmos.exceptions import CosmosHttpResponseError
+from shared_code.TranslationCache import TranslationCache
+
+class TestTranslationCache(unittest.IsolatedAsyncioTestCase):
+    languages = ["en", "ga", "es", "hi", "zh-Hans", "pl"]
+    result = {"language": "en", "score": 1.0, "translations": {"es": "¿Cuál es la mejor comida?"}}
+
+    async def testHitOnNormalizedText(self):
+        '''
+        Test whitespace variants of a text share one entry
+        '''
+        cache = TranslationCache()
+        await cache.put("What is the best food?", self.languages, self.result)
+
+        self.assertEqual(await cache.get("  What is  the best\tfood? ", self.languages), self.result)
+        self.assertIsNone(await cache.get("What is the best food?", ["en", "es"]))
+        self.assertEqual(cache.stats()['hits'], 1)
+        self.assertEqual(cache.stats()['misses'], 1)
+
+    async def testLeastRecentlyUsedEvicted(self):
+        '''
+        Test the least recently used entry is evicted at the size bound
+        '''
+        cache = TranslationCache(maxSize=2)
+        await cache.put("first prompt text here", self.languages, self.result)
+        await cache.put("second prompt text here", self.languages, self.result)
+        await cache.get("first prompt text here", self.languages)
+        await cache.put("third prompt text here", self.languages, self.result)
+
+        self.assertIsNotNone(await cache.get("first prompt text here", self.languages))
+        self.assertIsNone(await cache.get("second prompt text here", self.languages))
+        self.assertEqual(cache.stats()['size'], 2)
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    async def testExpired(self):
+        '''
+        Test entries expire after the time to live
+        '''
+        cache = TranslationCache(ttl=0.01)
+        await cache.put("What is the best food?", self.languages, self.result)
+        await asyncio.sleep(0.02)
+
+        self.assertIsNone(await cache.get("What is the best food?", self.languages))
+        self.assertEqual(cache.stats()['size'], 0)
+
+    async def testStoreFailuresIgnored(self):
+        '''
+        Test a failing Cosmos store counts as a miss and is skipped when storing, the memory cache still works
+        '''
+        class FailingContainer:
+            async def read_item(self, item, partition_key):
+                raise CosmosHttpResponseError(status_code=429, message="throttled")
+
+            async def upsert_item(self, body):
+                raise CosmosHttpResponseError(status_code=413, message="too large")
+
+        cache = TranslationCache(container=FailingContainer())
+        self.assertIsNone(await cache.get("What is the best food?", self.languages))
+        await cache.put("What is the best food?", self.languages, self.result)
+        self.assertEqual(await cache.get("What is the best food?", self.languages), self.result)
+        self.assertEqual(cache.stats()['misses'], 1)
+
+    if __name__ == '__main__':
+        unittest.main()
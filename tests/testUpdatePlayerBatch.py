@@ -0,0 +1,96 @@
+import unittest
+import requests
+import json
+from azure.cosmos import CosmosClient
+
+from pathlib import Path
+
+class TestUpdatePlayerBatch(unittest.TestCase):
+    LOCAL_DEV_URL = "http://localhost:7071/"
+    PUBLIC_URL = "https://quiplash-2425-bv1g22.azurewebsites.net/"
+    TEST_FUNCTION = "player/updateBatch"
+    TEST_URL = PUBLIC_URL + TEST_FUNCTION
+
+    pathToSettings = Path(__file__).parent.parent / 'local.settings.json'
+    with open(pathToSettings) as settings_file:
+        settings = json.load(settings_file)
+
+    MyCosmos = CosmosClient.from_connection_string(settings['Values']['AzureCosmosDBConnectionString'])
+    QuiplashDBProxy = MyCosmos.get_database_client(settings['Values']['DatabaseName'])
+    PlayerContainerProxy = QuiplashDBProxy.get_container_client(settings['Values']['PlayerContainerName'])
+    FunctionAppKey = settings['Values']['FunctionAppKey']
+
+    players = [
+        {"username": "alpha-user", "password": "password123"},
+        {"username": "bravo-user", "password": "password123"}
+    ]
+    updates = [
+        {"username": "alpha-user", "add_to_games_played": 1, "add_to_score": 100},
+        {"username": "bravo-user", "add_to_games_played": 1, "add_to_score": 50}
+    ]
+
+    def setUp(self):
+        '''
+        Register players before testing
+        '''
+        REGISTER_URL = self.TEST_URL.replace("player/updateBatch", "player/register")
+        for player in self.players:
+            requests.post(REGISTER_URL, json=player,
+                          headers={"x-functions-key": self.FunctionAppKey} )
+
+    def tearDown(self):
+        '''
+        Delete the players after testing
+        '''
+        for doc in self.PlayerContainerProxy.read_all_items():
+          self.PlayerContainerProxy.delete_item(item=doc, partition_key=doc['id'])
+
+    def testValidBatch(self):
+        '''
+        Test every player in a valid batch is updated
+        '''
+        response = requests.put(self.TEST_URL, json=self.updates,
+                                headers={"x-functions-key": self.FunctionAppKey} )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['result'], True)
+        self.assertEqual(response.json()['msg'], "OK")
+        self.assertEqual([r['username'] for r in response.json()['results']], ['alpha-user', 'bravo-user'])
+
+        players = {doc['username']: doc for doc in self.PlayerContainerProxy.read_all_items()}
+        self.assertEqual(players['alpha-user']['games_played'], 1)
+        self.assertEqual(players['alpha-user']['total_score'], 100)
+        self.assertEqual(players['bravo-user']['games_played'], 1)
+        self.assertEqual(players['bravo-user']['total_score'], 50)
+
+    def testPlayerDoesNotExist(self):
+        '''
+        Test a missing player is reported without failing the others
+        '''
+        updates = self.updates + [{"username": "notplayer", "add_to_games_played": 1, "add_to_score": 10}]
+        response = requests.put(self.TEST_URL, json=updates,
+                                headers={"x-functions-key": self.FunctionAppKey} )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['result'], False)
+        self.assertEqual(response.json()['msg'], "1 players not updated")
+        self.assertEqual(response.json()['results'][2]['msg'], "Player does not exist")
+        self.assertEqual(response.json()['results'][0]['result'], True)
+
+    def testInvalidBatch(self):
+        '''
+        Test nothing is applied when one update is invalid
+        '''
+        updates = self.updates + [{"username": "alpha-user", "add_to_games_played": "one", "add_to_score": 10}]
+        response = requests.put(self.TEST_URL, json=updates,
+                                headers={"x-functions-key": self.FunctionAppKey} )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['result'], False)
+        self.assertEqual(response.json()['msg'], "Invalid update")
+
+        for doc in self.PlayerContainerProxy.read_all_items():
+            self.assertEqual(doc['games_played'], 0)
+
+    if __name__ == '__main__':
+        unittest.main()